@@ -38,7 +38,7 @@ class TicketAdmin(admin.ModelAdmin):
                     instance.recipient_email = instance.ticket.sender_email
                 instance.clean()
                 instance.save()
-                utils.send_support_ticket_email(request, instance)
+                utils.queue_support_ticket_email(request, instance)
         formset.save_m2m()
 
     def change_view(
@@ -93,3 +93,10 @@ class TicketAdmin(admin.ModelAdmin):
 @admin.register(models.TicketMessage)
 class TicketMessageAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(models.OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to_email', 'created_at', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['sent_at', 'created_at']
+    readonly_fields = ['created_at', 'sent_at', 'attempts', 'last_error']
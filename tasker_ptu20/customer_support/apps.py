@@ -6,3 +6,7 @@ class CustomerSupportConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'customer_support'
     verbose_name = 'customer support'
+
+    def ready(self) -> None:
+        from . import signals
+        return super().ready()
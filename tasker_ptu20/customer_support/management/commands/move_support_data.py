@@ -0,0 +1,37 @@
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from tasker_ptu20.routers import SUPPORT
+from ... import models
+
+MODELS = (models.Ticket, models.TicketMessage, models.OutgoingEmail)
+
+
+class Command(BaseCommand):
+    help = "Copy tickets, messages and queued emails from the default database to the support database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default='default', help="database alias the support tables were in")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['source'] == SUPPORT:
+            raise CommandError("The source is the support database itself.")
+        if any(model.objects.using(SUPPORT).exists() for model in MODELS):
+            raise CommandError("The support database already has data, nothing copied.")
+        # tables created after the router was added, like the outgoing email queue, never existed in the source
+        tables = connections[options['source']].introspection.table_names()
+        with transaction.atomic(using=SUPPORT):
+            for model in MODELS:
+                if model._meta.db_table not in tables:
+                    self.stdout.write(f"{model._meta.verbose_name_plural}: no table in {options['source']}, skipped")
+                    continue
+                rows = model.objects.using(options['source']).order_by('pk').iterator(chunk_size=options['batch_size'])
+                total = 0
+                while batch := list(islice(rows, options['batch_size'])):
+                    model.objects.using(SUPPORT).bulk_create(batch)
+                    total += len(batch)
+                self.stdout.write(f"{model._meta.verbose_name_plural}: {total}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Support data copied, the old tables in {options['source']} can be dropped once verified."
+        ))
@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from ... import utils
+
+
+class Command(BaseCommand):
+    help = "Deliver queued support emails in batches over a single SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--max-attempts', type=int, default=utils.MAIL_MAX_ATTEMPTS)
+        parser.add_argument('--interval', type=float, default=5, help="seconds to sleep when the outbox is empty")
+        parser.add_argument('--once', action='store_true', help="drain the outbox and exit")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = utils.deliver_outgoing_emails(options['batch_size'], options['max_attempts'])
+            if sent or failed:
+                self.stdout.write(f"sent {sent}, failed {failed}")
+            if sent + failed >= options['batch_size']:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
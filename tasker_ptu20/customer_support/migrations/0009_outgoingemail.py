@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-16 23:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_support', '0008_ticket_access_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='subject')),
+                ('body', models.TextField(blank=True, default='', verbose_name='body')),
+                ('from_email', models.EmailField(blank=True, max_length=254, null=True, verbose_name='from')),
+                ('to_email', models.EmailField(max_length=254, verbose_name='to')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('next_attempt_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='next attempt at')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='attempts')),
+                ('sent_at', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='sent at')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='last error')),
+                ('ticket', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_emails', to='customer_support.ticket', verbose_name='ticket')),
+                ('ticket_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_emails', to='customer_support.ticketmessage', verbose_name='ticket message')),
+            ],
+            options={
+                'verbose_name': 'outgoing email',
+                'verbose_name_plural': 'outgoing emails',
+                'ordering': ['next_attempt_at', 'id'],
+            },
+        ),
+    ]
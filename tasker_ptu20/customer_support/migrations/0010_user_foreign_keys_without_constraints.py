@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-16 23:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_support', '0009_outgoingemail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='sender',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='support_tickets', to=settings.AUTH_USER_MODEL, verbose_name='sender'),
+        ),
+        migrations.AlterField(
+            model_name='ticketmessage',
+            name='recipient',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='received_ticket_messages', to=settings.AUTH_USER_MODEL, verbose_name='recipient'),
+        ),
+        migrations.AlterField(
+            model_name='ticketmessage',
+            name='sender',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='sent_ticket_messages', to=settings.AUTH_USER_MODEL, verbose_name='sender'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.translation import gettext as _
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 
 SUBJECT_CHOICES = (
@@ -29,8 +30,9 @@ class Ticket(models.Model):
     sender = models.ForeignKey(
         get_user_model(), 
         verbose_name=_("sender"), 
-        on_delete=models.CASCADE, 
-        related_name='support_tickets', 
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='support_tickets',
         null=True, blank=True,
     )
     sender_name = models.CharField(_("full name"), max_length=100, null=True, blank=True, db_index=True)
@@ -67,14 +69,16 @@ class TicketMessage(models.Model):
     sender = models.ForeignKey(
         get_user_model(), 
         verbose_name=_("sender"), 
-        on_delete=models.CASCADE, 
-        related_name='sent_ticket_messages', 
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='sent_ticket_messages',
         null=True, blank=True,
     )
     recipient = models.ForeignKey(
         get_user_model(),
         verbose_name=_("recipient"), 
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='received_ticket_messages',
         null=True, blank=True,
     )
@@ -109,3 +113,37 @@ class TicketMessage(models.Model):
 
     def get_absolute_url(self):
         return reverse("ticketmessage_detail", kwargs={"pk": self.pk})
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField(_("subject"), max_length=255)
+    body = models.TextField(_("body"), default='', blank=True)
+    from_email = models.EmailField(_("from"), max_length=254, null=True, blank=True)
+    to_email = models.EmailField(_("to"), max_length=254)
+    ticket = models.ForeignKey(
+        Ticket,
+        verbose_name=_("ticket"),
+        on_delete=models.CASCADE,
+        related_name='outgoing_emails',
+        null=True, blank=True,
+    )
+    ticket_message = models.ForeignKey(
+        TicketMessage,
+        verbose_name=_("ticket message"),
+        on_delete=models.CASCADE,
+        related_name='outgoing_emails',
+        null=True, blank=True,
+    )
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+    next_attempt_at = models.DateTimeField(_("next attempt at"), default=timezone.now, db_index=True)
+    attempts = models.PositiveIntegerField(_("attempts"), default=0)
+    sent_at = models.DateTimeField(_("sent at"), null=True, blank=True, db_index=True)
+    last_error = models.TextField(_("last error"), default='', blank=True)
+
+    class Meta:
+        verbose_name = _("outgoing email")
+        verbose_name_plural = _("outgoing emails")
+        ordering = ['next_attempt_at', 'id']
+
+    def __str__(self):
+        return _("{} to {}").format(self.subject, self.to_email)
@@ -0,0 +1,12 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from . import models
+
+
+@receiver(post_delete, sender=get_user_model())
+def delete_user_tickets(sender, instance, **kwargs):
+    # users live on another database, so the cascade from the sender/recipient keys is done here
+    models.TicketMessage.objects.filter(Q(sender_id=instance.pk) | Q(recipient_id=instance.pk)).delete()
+    models.Ticket.objects.filter(sender_id=instance.pk).delete()
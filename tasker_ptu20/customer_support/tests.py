@@ -1,3 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connections, router
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from . import models, utils
 
-# Create your tests here.
+
+class OutgoingEmailTestCase(TestCase):
+    databases = {'default', 'support'}
+
+    def create_ticket(self):
+        response = self.client.post(reverse('ticket_create'), {
+            'subject': 'bugs',
+            'body': 'it is broken',
+            'sender_name': 'Ona Onaite',
+            'sender_email': 'ona@example.com',
+        })
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+        return models.Ticket.objects.get()
+
+    def test_ticket_is_queued_not_sent(self):
+        ticket = self.create_ticket()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(ticket.mail_sent)
+        email = models.OutgoingEmail.objects.get()
+        self.assertEqual(email.ticket, ticket)
+        self.assertEqual(email.subject, f"Support Ticket #{ticket.pk}: bugs")
+
+    def test_worker_delivers_and_marks_sent(self):
+        ticket = self.create_ticket()
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'secret')
+        reply = models.TicketMessage.objects.create(ticket=ticket, body='fixed', sender=admin, recipient_email='ona@example.com')
+        models.OutgoingEmail.objects.create(subject='re', body='fixed', to_email='ona@example.com', ticket_message=reply)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open') as open_connection:
+            call_command('run_mail_worker', '--once', stdout=mock.Mock())
+        open_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(models.OutgoingEmail.objects.filter(sent_at__isnull=True).exists())
+        ticket.refresh_from_db()
+        reply.refresh_from_db()
+        self.assertTrue(ticket.mail_sent)
+        self.assertTrue(reply.mail_sent)
+
+    def test_failed_delivery_backs_off(self):
+        self.create_ticket()
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('smtp down')):
+            self.assertEqual(utils.deliver_outgoing_emails(), (0, 1))
+        email = models.OutgoingEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, 'smtp down')
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(utils.deliver_outgoing_emails(), (0, 0))
+        self.assertEqual(utils.retry_delay(3), timedelta(minutes=4))
+        self.assertEqual(utils.retry_delay(30), utils.MAIL_MAX_RETRY_DELAY)
+
+    def test_claimed_email_is_not_sent_twice(self):
+        self.create_ticket()
+        email = models.OutgoingEmail.objects.get()
+        other_worker = models.OutgoingEmail.objects.get()
+        self.assertTrue(utils.claim_email(email))
+        self.assertFalse(utils.claim_email(other_worker))
+        self.assertEqual(utils.deliver_outgoing_emails(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+        models.OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(utils.deliver_outgoing_emails(), (1, 0))
+
+
+class SupportDatabaseTestCase(TestCase):
+    databases = {'default', 'support'}
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('ona', 'ona@example.com', 'secret')
+        self.client.force_login(self.user)
+
+    def test_tickets_are_stored_in_support_database(self):
+        self.client.post(reverse('ticket_create'), {'subject': 'bugs', 'body': 'it is broken'})
+        ticket = models.Ticket.objects.get()
+        self.assertEqual(ticket._state.db, 'support')
+        self.assertEqual(ticket.sender, self.user)
+        self.assertEqual(list(self.user.support_tickets.all()), [ticket])
+        self.assertNotIn('customer_support_ticket', connections['default'].introspection.table_names())
+        self.assertTrue(router.allow_migrate('support', 'customer_support'))
+        self.assertFalse(router.allow_migrate('support', 'tasks'))
+        self.assertFalse(router.allow_migrate('default', 'customer_support'))
+
+    def test_ticket_detail_reads_sender_from_default(self):
+        ticket = models.Ticket.objects.create(subject='bugs', sender=self.user)
+        models.TicketMessage.objects.create(ticket=ticket, body='hello', sender=self.user)
+        response = self.client.get(reverse('ticket_detail', args=[ticket.pk]))
+        self.assertEqual(response.status_code, 200)
+        ticket.refresh_from_db()
+        ticket.full_clean()
+
+    def test_move_skips_tables_missing_from_source(self):
+        output = StringIO()
+        call_command('move_support_data', source='default', stdout=output)
+        self.assertIn("outgoing emails: no table in default, skipped", output.getvalue())
+        self.assertFalse(models.Ticket.objects.exists())
+
+    def test_deleting_user_deletes_tickets(self):
+        ticket = models.Ticket.objects.create(subject='bugs', sender=self.user)
+        models.TicketMessage.objects.create(ticket=ticket, body='hello', recipient=self.user)
+        other = models.Ticket.objects.create(subject='other', sender_email='guest@example.com')
+        self.user.delete()
+        self.assertEqual(list(models.Ticket.objects.all()), [other])
+        self.assertFalse(models.TicketMessage.objects.exists())
@@ -1,30 +1,98 @@
+from datetime import timedelta
 from django.conf import settings
 from django.contrib import messages
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from django.http import HttpRequest
 from django.template.loader import get_template
 from . import models
 
-def send_support_ticket_email(request: HttpRequest, obj:models.Ticket | models.TicketMessage):
+MAIL_RETRY_DELAY = timedelta(minutes=1)
+MAIL_MAX_RETRY_DELAY = timedelta(hours=6)
+MAIL_MAX_ATTEMPTS = 8
+MAIL_LEASE = timedelta(minutes=5)
+
+def queue_support_ticket_email(request: HttpRequest, obj:models.Ticket | models.TicketMessage):
     if isinstance(obj, models.Ticket):
         template_text = get_template('customer_support/ticket_email_text.html')
         subject = obj.subject
         obj_id = obj.id
         recipient_email = settings.ADMIN_EMAIL
+        link = {'ticket': obj}
     elif isinstance(obj, models.TicketMessage):
         template_text = get_template('customer_support/ticketmessage_email_text.html')
         subject = obj.ticket.subject
         obj_id = obj.ticket.id
         recipient_email = obj.recipient_email
+        link = {'ticket_message': obj}
     else:
         raise TypeError("support ticket/message object type error")
-    message = template_text.render({'obj': obj})
+    models.OutgoingEmail.objects.create(
+        subject=f"Support Ticket #{obj_id}: {subject}",
+        body=template_text.render({'obj': obj}),
+        from_email=obj.sender_email,
+        to_email=recipient_email,
+        **link,
+    )
+    messages.success(request, _("Message sent. Thank you. We will get back to you as soon as we can."))
+
+def retry_delay(attempts: int) -> timedelta:
+    return min(MAIL_RETRY_DELAY * 2 ** (attempts - 1), MAIL_MAX_RETRY_DELAY)
+
+def postpone_email(email: models.OutgoingEmail, error: Exception) -> None:
+    email.attempts += 1
+    email.last_error = str(error)
+    email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=['attempts', 'last_error', 'next_attempt_at'])
+
+def claim_email(email: models.OutgoingEmail) -> bool:
+    # only one worker moves next_attempt_at from the value it read, the lease expires if that worker dies
+    lease = timezone.now() + MAIL_LEASE
+    claimed = models.OutgoingEmail.objects.filter(
+        pk=email.pk, sent_at__isnull=True, next_attempt_at=email.next_attempt_at,
+    ).update(next_attempt_at=lease)
+    if claimed:
+        email.next_attempt_at = lease
+    return bool(claimed)
+
+def deliver_outgoing_emails(batch_size: int = 50, max_attempts: int = MAIL_MAX_ATTEMPTS) -> tuple[int, int]:
+    emails = list(models.OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=max_attempts,
+        next_attempt_at__lte=timezone.now(),
+    )[:batch_size])
+    emails = [email for email in emails if claim_email(email)]
+    if not emails:
+        return 0, 0
+    sent, failed = [], 0
+    connection = get_connection()
     try:
-        send_mail(f"Support Ticket #{obj_id}: {subject}", message, obj.sender_email, [recipient_email], fail_silently=False)
+        connection.open()
     except Exception as error:
-        messages.warning(request, _("Thank you. We had some issues ({}) but we still got your message.").format(error))
-    else:
-        obj.mail_sent = True
-        obj.save()
-        messages.success(request, _("Message sent. Thank you. We will get back to you as soon as we can."))
+        for email in emails:
+            postpone_email(email, error)
+        return 0, len(emails)
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, [email.to_email], connection=connection,
+            )
+            try:
+                message.send(fail_silently=False)
+            except Exception as error:
+                failed += 1
+                postpone_email(email, error)
+            else:
+                sent.append(email)
+    finally:
+        connection.close()
+    if sent:
+        models.OutgoingEmail.objects.filter(pk__in=[email.pk for email in sent]).update(sent_at=timezone.now())
+        models.Ticket.objects.filter(
+            pk__in=[email.ticket_id for email in sent if email.ticket_id]
+        ).update(mail_sent=True)
+        models.TicketMessage.objects.filter(
+            pk__in=[email.ticket_message_id for email in sent if email.ticket_message_id]
+        ).update(mail_sent=True)
+    return len(sent), failed
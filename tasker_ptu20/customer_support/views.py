@@ -45,7 +45,7 @@ class TicketDetail(UserPassesTestMixin, generic.edit.FormMixin, generic.DetailVi
             form.instance.sender_name = ticket.sender_name
             form.instance.sender_email = ticket.sender_email
         form.save()
-        utils.send_support_ticket_email(self.request, form.instance)
+        utils.queue_support_ticket_email(self.request, form.instance)
         return redirect(f"{reverse_lazy('ticket_detail', kwargs={'pk':ticket.pk})}?access_key={ticket.access_key}")
 
     def test_func(self) -> bool | None:
@@ -76,5 +76,5 @@ class TicketCreateView(generic.CreateView):
         return super().form_valid(form)
 
     def get_success_url(self) -> str:
-        utils.send_support_ticket_email(self.request, self.obj)
+        utils.queue_support_ticket_email(self.request, self.obj)
         return reverse_lazy('index')
@@ -0,0 +1,262 @@
+import hashlib
+import math
+import os
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+_missing = object()
+
+
+class TieredCache(BaseCache):
+    """Bounded in-process LRU with a short TTL in front of a shared cache alias.
+
+    Keys are namespaced by the part before the first colon, e.g. ``dashboard:global``.
+    ``delete_prefix('dashboard')`` bumps the namespace version in the shared cache, and
+    every worker sees it on its next read. Namespace versions and the namespaces listed in
+    the ``SHARED_ONLY`` option are never kept locally, since other entries are keyed by them.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'shared')
+        self._local_timeout = float(options.get('LOCAL_TIMEOUT', 5))
+        self._shared_only = tuple(options.get('SHARED_ONLY', ()))
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(('local_hits', 'shared_hits', 'misses', 'sets', 'evictions'), 0)
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self._shared_alias]
+
+    def _is_shared_only(self, key: str) -> bool:
+        return key.split('@', 1)[0] in self._shared_only
+
+    def _local_get(self, key: str):
+        if self._is_shared_only(key):
+            return _missing
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _missing
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return _missing
+            self._local.move_to_end(key)
+        return pickle.loads(data)
+
+    def _local_set(self, key: str, value, timeout=DEFAULT_TIMEOUT) -> None:
+        ttl = self._local_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            ttl = min(ttl, timeout)
+        if ttl <= 0 or self._is_shared_only(key):
+            return
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl, data)
+            self._local.move_to_end(key)
+            while len(self._local) > self._max_entries:
+                self._local.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _local_delete(self, key: str) -> None:
+        with self._lock:
+            self._local.pop(key, None)
+
+    def _namespace_version(self, namespace: str) -> int:
+        return self.shared.get(f"namespace-version:{namespace}", 0)
+
+    def _key(self, key: str, version=None) -> str:
+        namespace = key.split(':', 1)[0]
+        version = self.version if version is None else version
+        return f"{namespace}@{self._namespace_version(namespace)}:{version}:{key}"
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        value = self._local_get(key)
+        if value is not _missing:
+            self._stats['local_hits'] += 1
+            return value
+        value = self.shared.get(key, _missing)
+        if value is _missing:
+            self._stats['misses'] += 1
+            return default
+        self._stats['shared_hits'] += 1
+        self._local_set(key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self._stats['sets'] += 1
+        self.shared.set(key, value, timeout)
+        self._local_set(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        if not self.shared.add(key, value, timeout):
+            return False
+        self._local_set(key, value, timeout)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(self._key(key, version), timeout)
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        self._local_delete(key)
+        return self.shared.delete(key)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _missing, version) is not _missing
+
+    def delete_prefix(self, namespace: str) -> None:
+        if ':' in namespace:
+            raise ValueError(f"delete_prefix() takes a namespace without colons, got {namespace!r}.")
+        version_key = f"namespace-version:{namespace}"
+        self.shared.add(version_key, 0, None)
+        try:
+            version = self.shared.incr(version_key)
+        except ValueError:
+            version = 1
+            self.shared.set(version_key, version, None)
+        with self._lock:
+            for key in [key for key in self._local if key.startswith(f"{namespace}@")]:
+                del self._local[key]
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def stats(self) -> dict[str, int]:
+        stats = dict(self._stats)
+        stats['hits'] = stats['local_hits'] + stats['shared_hits']
+        stats['local_entries'] = len(self._local)
+        return stats
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.stored = False
+
+
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _lock_path(key: str) -> Path:
+    return Path(settings.SINGLE_FLIGHT_LOCK_DIR) / f"{hashlib.md5(key.encode()).hexdigest()}.lock"
+
+
+def _lock_file(key: str, lock_timeout: float) -> bool:
+    """Atomically creates the lock file of ``key``, so only one process computes it."""
+    path = _lock_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for attempt in range(2):
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - path.stat().st_mtime < lock_timeout:
+                    return False
+                # left behind by a process that died while computing
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    return False
+
+
+def _start_flight(key: str, lock_timeout: float) -> _Flight | None:
+    with _flights_lock:
+        if key in _flights:
+            return None
+        flight = _flights[key] = _Flight()
+    if _lock_file(key, lock_timeout):
+        return flight
+    _end_flight(key, flight)
+    return None
+
+
+def _end_flight(key: str, flight: _Flight) -> None:
+    with _flights_lock:
+        if _flights.get(key) is flight:
+            del _flights[key]
+    flight.done.set()
+
+
+def _wait_for_flight(cache: BaseCache, key: str, compute: Callable[[], Any], lock_timeout: float) -> Any:
+    with _flights_lock:
+        flight = _flights.get(key)
+    if flight is not None:
+        flight.done.wait(lock_timeout)
+        entry = cache.get(key) if flight.stored else None
+        return compute() if entry is None else entry[0]
+    deadline = time.time() + lock_timeout
+    path = _lock_path(key)
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if not path.exists():
+            break
+    return compute()
+
+
+def single_flight(
+        key: str,
+        compute: Callable[[], Any],
+        timeout: float,
+        stale_timeout: float | None = None,
+        beta: float = 1.0,
+        lock_timeout: float = 10,
+        should_store: Callable[[Any], bool] | None = None,
+        cache: BaseCache | None = None,
+    ) -> Any:
+    """Compute ``key`` once across threads and processes, serving stale values meanwhile.
+
+    Entries are refreshed early with probability growing towards expiry (XFetch), and are
+    kept for ``stale_timeout`` seconds after expiry so that only the lock holder recomputes
+    while everyone else keeps getting the previous value. Threads wait on a per-key flight,
+    other processes on a lock file in ``SINGLE_FLIGHT_LOCK_DIR``; when the result is not
+    stored they compute it themselves right away.
+    """
+    cache = cache or caches['default']
+    stale_timeout = timeout if stale_timeout is None else stale_timeout
+
+    def lead(flight: _Flight) -> Any:
+        try:
+            started = time.time()
+            value = compute()
+            delta = time.time() - started
+            if should_store is None or should_store(value):
+                cache.set(key, (value, delta, time.time() + timeout), timeout + stale_timeout)
+                flight.stored = True
+            return value
+        finally:
+            _lock_path(key).unlink(missing_ok=True)
+            _end_flight(key, flight)
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if time.time() - delta * beta * math.log(1 - random.random()) < expires_at:
+            return value
+        flight = _start_flight(key, lock_timeout)
+        return value if flight is None else lead(flight)
+    flight = _start_flight(key, lock_timeout)
+    if flight is not None:
+        return lead(flight)
+    return _wait_for_flight(cache, key, compute, lock_timeout)
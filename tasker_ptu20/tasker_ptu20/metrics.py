@@ -0,0 +1,238 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpRequest, HttpResponse
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.crypto import constant_time_compare
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+HISTOGRAMS = {
+    'request_duration_seconds': ("Request latency per view.", SECONDS_BUCKETS),
+    'sql_duration_seconds': ("Time spent in SQL per request.", SECONDS_BUCKETS),
+    'template_duration_seconds': ("Time spent rendering templates per request.", SECONDS_BUCKETS),
+    'queries': ("SQL queries per request.", QUERY_BUCKETS),
+}
+PROXY_HEADERS = ('Forwarded', 'X-Forwarded-For', 'X-Real-IP')
+CACHE_COUNTERS = {
+    'local_hits': ('cache_hits_total', 'local'),
+    'shared_hits': ('cache_hits_total', 'shared'),
+    'misses': ('cache_misses_total', None),
+    'sets': ('cache_sets_total', None),
+    'evictions': ('cache_evictions_total', None),
+}
+CACHE_HELP = {
+    'cache_hits_total': "Default cache hits per tier.",
+    'cache_misses_total': "Default cache lookups that found nothing.",
+    'cache_sets_total': "Values written to the default cache.",
+    'cache_evictions_total': "Entries evicted from the in-process tier.",
+}
+
+_current = ContextVar('metrics_request', default=None)
+
+
+class Registry:
+    """Histograms of this process, flushed to ``METRICS_DIR/<pid>.json`` for the other workers."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.pid = os.getpid()
+        self.views = {}
+        self.flushed_at = 0
+
+    def observe(self, view: str, values: dict[str, float]) -> None:
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            histograms = self.views.setdefault(view, {
+                name: {'buckets': [0] * (len(buckets) + 1), 'sum': 0, 'count': 0}
+                for name, (help_text, buckets) in HISTOGRAMS.items()
+            })
+            for name, value in values.items():
+                histogram = histograms[name]
+                buckets = HISTOGRAMS[name][1]
+                index = next((index for index, bound in enumerate(buckets) if value <= bound), len(buckets))
+                histogram['buckets'][index] += 1
+                histogram['sum'] += value
+                histogram['count'] += 1
+
+    def flush(self, force: bool = False) -> None:
+        if not force and time.monotonic() - self.flushed_at < settings.METRICS_FLUSH_INTERVAL:
+            return
+        with self.lock:
+            data = json.dumps({'views': self.views, 'cache': cache_stats()})
+            self.flushed_at = time.monotonic()
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as output:
+            output.write(data)
+        os.replace(output.name, directory / f"{self.pid}.json")
+
+
+registry = Registry()
+
+
+def cache_stats() -> dict[str, int]:
+    backend = caches['default']
+    stats = backend.stats() if hasattr(backend, 'stats') else {}
+    return {name: stats.get(name, 0) for name in CACHE_COUNTERS}
+
+
+def is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def read_workers() -> list[dict]:
+    workers = []
+    for path in Path(settings.METRICS_DIR).glob('*.json'):
+        try:
+            if not is_alive(int(path.stem)):
+                path.unlink(missing_ok=True)
+                continue
+            workers.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return workers
+
+
+def collect(workers: list[dict] | None = None) -> dict:
+    views = {}
+    for data in read_workers() if workers is None else workers:
+        for view, histograms in data.get('views', {}).items():
+            merged = views.setdefault(view, {})
+            for name, histogram in histograms.items():
+                if name not in merged:
+                    merged[name] = {'buckets': list(histogram['buckets']), 'sum': histogram['sum'], 'count': histogram['count']}
+                    continue
+                merged[name]['buckets'] = [a + b for a, b in zip(merged[name]['buckets'], histogram['buckets'])]
+                merged[name]['sum'] += histogram['sum']
+                merged[name]['count'] += histogram['count']
+    return views
+
+
+def collect_cache(workers: list[dict] | None = None) -> dict[str, int]:
+    totals = dict.fromkeys(CACHE_COUNTERS, 0)
+    for data in read_workers() if workers is None else workers:
+        for name, value in data.get('cache', {}).items():
+            if name in totals:
+                totals[name] += value
+    return totals
+
+
+def render_prometheus(views: dict, cache: dict[str, int] | None = None) -> str:
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        metric = f"tasker_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for view in sorted(views):
+            histogram = views[view].get(name)
+            if not histogram:
+                continue
+            label = view.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), histogram['buckets']):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{view="{label}"}} {histogram["sum"]:.6f}')
+            lines.append(f'{metric}_count{{view="{label}"}} {histogram["count"]}')
+    for metric, help_text in CACHE_HELP.items() if cache is not None else ():
+        lines.append(f"# HELP tasker_{metric} {help_text}")
+        lines.append(f"# TYPE tasker_{metric} counter")
+        for name, (counter, tier) in CACHE_COUNTERS.items():
+            if counter == metric:
+                label = f'{{tier="{tier}"}}' if tier else ''
+                lines.append(f"tasker_{metric}{label} {cache[name]}")
+    return "\n".join(lines) + "\n"
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings['template_duration_seconds'] += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend that adds top level render time to the request metrics."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        timings = {'sql_duration_seconds': 0, 'template_duration_seconds': 0, 'queries': 0}
+
+        def time_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                timings['sql_duration_seconds'] += time.perf_counter() - started
+                timings['queries'] += 1
+
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(time_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        timings['request_duration_seconds'] = time.perf_counter() - started
+        match = request.resolver_match
+        registry.observe(match.view_name if match else '<unresolved>', timings)
+        registry.flush()
+        return response
+
+
+def is_allowed(request: HttpRequest) -> bool:
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    if token and constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return True
+    # a reverse proxy on this host connects from 127.0.0.1 on behalf of anyone
+    proxied = any(header in request.headers for header in PROXY_HEADERS)
+    return not proxied and request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    if not settings.METRICS_ENABLED or not is_allowed(request):
+        raise Http404
+    registry.flush(force=True)
+    workers = read_workers()
+    return HttpResponse(render_prometheus(collect(workers), collect_cache(workers)), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,244 @@
+import cProfile
+import logging
+import marshal
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_in_lists = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,?)+\)")
+_spaces = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def normalize_sql(sql: str) -> str:
+    sql = _literals.sub('?', sql)
+    sql = _in_lists.sub('IN (...)', sql)
+    return _spaces.sub(' ', sql).strip()
+
+
+def template_line() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                return f"{origin.template_name or origin.name}:{token.lineno}"
+        frame = frame.f_back
+    return ''
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((
+                context['connection'].alias,
+                normalize_sql(sql),
+                template_line(),
+                time.perf_counter() - started,
+            ))
+
+    @property
+    def duration(self) -> float:
+        return sum(query[3] for query in self.queries)
+
+    def duplicates(self) -> Counter:
+        counts = Counter(sql for alias, sql, line, duration in self.queries)
+        return Counter({sql: count for sql, count in counts.items() if count > 1})
+
+    def n_plus_one(self, threshold: int) -> Counter:
+        counts = Counter((line, sql) for alias, sql, line, duration in self.queries if line)
+        return Counter({key: count for key, count in counts.items() if count >= threshold})
+
+
+class QueryProfilerMiddleware:
+    """Counts SQL queries per request, reports repeats and enforces ``QUERY_BUDGETS``.
+
+    Enabled by ``QUERY_PROFILING``. Budgets are keyed by URL name, e.g. ``task_list`` or
+    ``admin:tasks_project_changelist``; going over one fails the request when DEBUG is on.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        self.report(request, response, recorder)
+        return response
+
+    def report(self, request: HttpRequest, response: HttpResponse, recorder: QueryRecorder) -> None:
+        view_name = request.resolver_match.view_name if request.resolver_match else ''
+        count = len(recorder.queries)
+        duplicates = recorder.duplicates()
+        repeated = recorder.n_plus_one(getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 3))
+        response['X-Query-Count'] = str(count)
+        response['X-Query-Time'] = f"{recorder.duration * 1000:.1f}ms"
+        response['X-Query-Duplicates'] = str(sum(duplicates.values()) - len(duplicates))
+        response['X-Query-N-Plus-One'] = ", ".join(
+            f"{line}x{repeats}" for (line, sql), repeats in repeated.most_common()
+        )
+        logger.info(
+            "%s %s (%s): %d queries in %.1fms, %d duplicated",
+            request.method, request.path, view_name, count, recorder.duration * 1000, len(duplicates),
+        )
+        for (line, sql), repeats in repeated.most_common():
+            logger.warning("N+1 in %s at %s: %d x %s", view_name, line, repeats, sql)
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+        if budget is not None and count > budget:
+            message = f"{view_name} ran {count} queries, budget is {budget}"
+            if settings.DEBUG:
+                raise QueryBudgetExceeded(message)
+            logger.error(message)
+
+
+def save_request_profile(request: HttpRequest, profiler: cProfile.Profile, duration: float):
+    from tasks.models import RequestProfile
+    profiler.create_stats()
+    view_name = request.resolver_match.view_name if request.resolver_match else ''
+    profile = RequestProfile(
+        method=request.method,
+        path=request.get_full_path()[:255],
+        view_name=view_name[:100],
+        user=request.user,
+        duration_ms=duration * 1000,
+    )
+    name = f"{timezone.now():%Y%m%d-%H%M%S}-{view_name.replace(':', '-') or 'unresolved'}.prof"
+    profile.dump.save(name, ContentFile(marshal.dumps(profiler.stats)), save=True)
+    for stale in RequestProfile.objects.order_by('-created_at', '-pk')[settings.PROFILE_MAX_DUMPS:]:
+        stale.delete()
+    return profile
+
+
+class CProfileMiddleware:
+    """Runs a staff request under cProfile when it has an ``X-Profile`` header.
+
+    A header, unlike a query parameter, cannot be added by a cross-site link or image
+    loaded in a staff browser. The pstats dump is kept as a ``RequestProfile`` (browsable
+    in the admin), only the newest ``PROFILE_MAX_DUMPS`` are kept.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not request.headers.get('X-Profile') or not request.user.is_staff:
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        profile = save_request_profile(request, profiler, time.perf_counter() - started)
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
+
+
+def explain(connection, sql: str, params) -> str:
+    if connection.vendor != 'sqlite':
+        return ''
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        rows = cursor.fetchall()
+    depth = {0: -1}
+    lines = []
+    for node_id, parent_id, unused, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        lines.append(f"{'  ' * depth[node_id]}{detail}")
+    return "\n".join(lines)
+
+
+def is_full_scan(plan: str) -> bool:
+    return any(
+        line.strip().startswith('SCAN ') and ' USING ' not in line
+        for line in plan.splitlines()
+    )
+
+
+def save_slow_queries(request: HttpRequest, queries: list[tuple]) -> None:
+    from tasks.models import SlowQuery
+    source = request.resolver_match.view_name if request.resolver_match else ''
+    if request.method == 'POST' and request.POST.get('action'):
+        source = f"{source} action={request.POST['action']}"
+    slow_queries = []
+    for connection, sql, params, duration in queries:
+        try:
+            plan = explain(connection, sql, params)
+        except Exception as error:
+            plan = f"EXPLAIN failed: {error}"
+        slow_queries.append(SlowQuery(
+            duration_ms=duration * 1000,
+            source=source[:150],
+            path=request.get_full_path()[:255],
+            database=connection.alias,
+            sql=sql,
+            params=repr(params)[:2000],
+            plan=plan,
+            full_scan=is_full_scan(plan),
+        ))
+    saved = SlowQuery.objects.bulk_create(slow_queries)
+    SlowQuery.objects.filter(pk__lte=saved[-1].pk - settings.SLOW_QUERY_MAX_ROWS).delete()
+
+
+class SlowQueryMiddleware:
+    """Stores ORM statements slower than ``SLOW_QUERY_THRESHOLD_MS`` with their query plans.
+
+    Enabled by ``SLOW_QUERY_LOG``. The ``SlowQuery`` table keeps the newest
+    ``SLOW_QUERY_MAX_ROWS`` rows.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_LOG', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        slow = []
+
+        def record(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - started
+                if duration >= threshold and not many:
+                    slow.append((context['connection'], sql, params, duration))
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record))
+            response = self.get_response(request)
+        if slow:
+            save_slow_queries(request, slow)
+        return response
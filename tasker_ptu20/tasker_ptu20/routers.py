@@ -0,0 +1,134 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+REPLICA = 'replica'
+SUPPORT = 'support'
+SUPPORT_APPS = ('customer_support', )
+PRIMARY_COOKIE = 'primary_until'
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+PRIMARY_APPS = ('sessions', )
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+class SupportRouter:
+    """Keeps ``customer_support`` on its own database, so ticket and mail queue writes take
+    their own SQLite write lock instead of the one tasks are saved under.
+
+    Its user foreign keys point across databases, so they have no database constraints and
+    user lookups from support objects are sent back to default.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in SUPPORT_APPS:
+            return SUPPORT
+        return self.outside_support(hints)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in SUPPORT_APPS:
+            return SUPPORT
+        return self.outside_support(hints)
+
+    def outside_support(self, hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == SUPPORT:
+            return 'default'
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._meta.app_label in SUPPORT_APPS or obj2._meta.app_label in SUPPORT_APPS:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label in SUPPORT_APPS:
+            return db == SUPPORT
+        if db == SUPPORT:
+            return False
+        return None
+
+
+class ReplicaRouter:
+    """Sends reads to the replica inside ``read_replica`` views, everything else to default."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return 'default'
+        return REPLICA if _use_replica.get() else 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
+
+
+def wants_primary(request: HttpRequest) -> bool:
+    try:
+        return float(request.COOKIES.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+@contextmanager
+def primary():
+    """Reads from default inside a ``read_replica`` view, for anything stored in a shared cache."""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_replica(view: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if not settings.READ_REPLICA or request.method not in ('GET', 'HEAD') or wants_primary(request):
+            return view(request, *args, **kwargs)
+        if hasattr(request, 'user'):
+            request.user.is_authenticated
+        token = _use_replica.set(True)
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            return response
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+class ReadYourWritesMiddleware:
+    """Keeps a client on the primary for ``READ_YOUR_WRITES_SECONDS`` after its request wrote
+    anything, including GET views like ``task_done`` that change data.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'READ_REPLICA', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        wrote = False
+
+        def detect_writes(execute, sql, params, many, context):
+            nonlocal wrote
+            wrote = wrote or sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS)
+            return execute(sql, params, many, context)
+
+        with connections['default'].execute_wrapper(detect_writes):
+            response = self.get_response(request)
+        if wrote:
+            seconds = settings.READ_YOUR_WRITES_SECONDS
+            response.set_cookie(PRIMARY_COOKIE, f"{time.time() + seconds:.0f}", max_age=seconds, samesite='Lax')
+        return response
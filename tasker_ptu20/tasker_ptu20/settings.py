@@ -44,12 +44,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tasker_ptu20.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'tasker_ptu20.profiling.QueryProfilerMiddleware',
+    'tasker_ptu20.profiling.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tasker_ptu20.routers.ReadYourWritesMiddleware',
+    'tasker_ptu20.profiling.CProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -58,7 +63,7 @@ ROOT_URLCONF = 'tasker_ptu20.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'tasker_ptu20.metrics.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,12 +83,86 @@ WSGI_APPLICATION = 'tasker_ptu20.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# WAL lets readers run alongside the single writer, IMMEDIATE transactions take the write
+# lock up front so busy_timeout applies instead of failing on lock upgrade
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 268435456,
+    'cache_size': -20000,
+    'temp_store': 'memory',
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'tasker_ptu20.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': SQLITE_PRAGMAS,
+        },
+    },
+    # read-only copy for read_replica views, locally kept in sync with manage.py sync_replica
+    'replica': {
+        'ENGINE': 'tasker_ptu20.sqlite3',
+        'NAME': BASE_DIR / 'db-replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pragmas': SQLITE_PRAGMAS,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+    # customer_support tables, migrate with manage.py migrate --database support
+    'support': {
+        'ENGINE': 'tasker_ptu20.sqlite3',
+        'NAME': BASE_DIR / 'db-support.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': SQLITE_PRAGMAS,
+        },
+    },
+}
+DATABASE_ROUTERS = ['tasker_ptu20.routers.SupportRouter', 'tasker_ptu20.routers.ReplicaRouter']
+READ_REPLICA = False
+READ_YOUR_WRITES_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# small per-process LRU in front of a file based cache shared by all workers
+
+CACHES = {
+    'default': {
+        'BACKEND': 'tasker_ptu20.cache.TieredCache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 5,
+            # project generations key other entries, a stale local copy would serve old fragments
+            'SHARED_ONLY': ('generation', ),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
 }
+# lock files making single_flight compute a key in one process at a time
+SINGLE_FLIGHT_LOCK_DIR = BASE_DIR / 'cache' / 'locks'
+TEST_RUNNER = 'tasker_ptu20.test_runner.TestRunner'
 
 
 # Password validation
@@ -135,6 +214,42 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = '/'
 
+# seek on ordering keys instead of COUNT(*) + OFFSET in task and project lists
+KEYSET_PAGINATION = False
+
+# per request SQL report in X-Query-* headers and logs, budgets fail the request in DEBUG
+QUERY_PROFILING = False
+QUERY_N_PLUS_ONE_THRESHOLD = 3
+QUERY_BUDGETS = {
+    'index': 8,
+    'project_list': 6,
+    'project_detail': 8,
+    'task_list': 6,
+    'task_detail': 8,
+    'autocomplete_users': 2,
+    'autocomplete_projects': 2,
+    'ticket_list': 5,
+    'admin:tasks_project_changelist': 10,
+}
+
+# statements slower than the threshold are stored with EXPLAIN QUERY PLAN in tasks.SlowQuery
+SLOW_QUERY_LOG = False
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_MAX_ROWS = 500
+
+# per view histograms merged from every worker's file in METRICS_DIR, served at /metrics
+METRICS_ENABLED = False
+METRICS_DIR = BASE_DIR / 'metrics'
+METRICS_FLUSH_INTERVAL = 1
+# direct scrapes only, requests forwarded by a proxy need a staff login or the bearer token
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+METRICS_TOKEN = ''
+
+# staff requests with an X-Profile header run under cProfile, dumps are in the admin
+REQUEST_PROFILING = False
+PROFILE_DIR = BASE_DIR / 'profiles'
+PROFILE_MAX_DUMPS = 50
+
 TINYMCE_DEFAULT_CONFIG = {
     "menubar": "file edit view insert format tools table help",
     "plugins": "advlist autolink lists link image charmap anchor "
@@ -0,0 +1,24 @@
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the tests against a throwaway shared cache and lock directory, never ``BASE_DIR / 'cache'``."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = tempfile.TemporaryDirectory()
+        caches = {alias: dict(options) for alias, options in settings.CACHES.items()}
+        caches['shared']['LOCATION'] = self.cache_directory.name
+        self.cache_settings = override_settings(
+            CACHES=caches, SINGLE_FLIGHT_LOCK_DIR=Path(self.cache_directory.name, 'locks'),
+        )
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        self.cache_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
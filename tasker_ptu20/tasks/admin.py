@@ -1,4 +1,10 @@
+import io
+import pstats
 from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from . import models
 
@@ -17,16 +23,21 @@ class ProjectAdmin(admin.ModelAdmin):
     )
     autocomplete_fields = ['owner']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_task_stats()
+
     def total_tasks(self, obj: models.Project):
-        return obj.tasks.count()
+        return obj.total_tasks
     total_tasks.short_description = _("total tasks")
+    total_tasks.admin_order_field = 'total_tasks'
 
     def undone_tasks(self, obj: models.Project):
-        return obj.tasks.filter(is_done=False).count()
+        return obj.undone_tasks
     undone_tasks.short_description = _("undone tasks")
+    undone_tasks.admin_order_field = 'undone_tasks'
 
     def recent_tasks(self, obj: models.Project):
-        return "; ".join(obj.tasks.order_by('-created_at').values_list('name', flat=True)[:3])
+        return "; ".join(task.name for task in obj.recent_task_list)
     recent_tasks.short_description = _("recent tasks")
 
 
@@ -61,6 +72,79 @@ class ProjectLikeAdmin(admin.ModelAdmin):
     list_display = ['project', 'user', 'like_type']
 
 
+class CounterAdmin(admin.ModelAdmin):
+    list_display = ['scope', 'object_id', 'tasks', 'undone', 'done', 'projects', 'likes']
+    list_filter = ['scope']
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'method', 'path', 'view_name', 'user', 'duration_ms', 'download']
+    list_filter = ['view_name', 'method']
+    search_fields = ['path', 'view_name']
+    date_hierarchy = 'created_at'
+    fields = ['created_at', 'method', 'path', 'view_name', 'user', 'duration_ms', 'download', 'top_functions']
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='tasks_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        profile = get_object_or_404(models.RequestProfile, pk=pk)
+        if not self.has_view_permission(request, profile):
+            raise Http404
+        return FileResponse(profile.dump.open('rb'), as_attachment=True, filename=profile.dump.name)
+
+    def download(self, obj: models.RequestProfile):
+        return format_html(
+            '<a href="{}">{}</a>', reverse('admin:tasks_requestprofile_download', args=[obj.pk]), obj.dump.name,
+        )
+    download.short_description = _("pstats dump")
+
+    def top_functions(self, obj: models.RequestProfile):
+        output = io.StringIO()
+        pstats.Stats(obj.dump.path, stream=output).sort_stats('cumulative').print_stats(40)
+        return format_html('<pre>{}</pre>', output.getvalue())
+    top_functions.short_description = _("top functions by cumulative time")
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'duration_ms', 'full_scan', 'source', 'short_sql']
+    list_filter = ['full_scan', 'source', 'database']
+    search_fields = ['sql', 'path', 'source']
+    date_hierarchy = 'created_at'
+    fields = ['created_at', 'duration_ms', 'source', 'path', 'database', 'full_scan', 'sql', 'params', 'query_plan']
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def short_sql(self, obj: models.SlowQuery):
+        return obj.sql[:120]
+    short_sql.short_description = _("SQL")
+
+    def query_plan(self, obj: models.SlowQuery):
+        return format_html('<pre>{}</pre>', obj.plan)
+    query_plan.short_description = _("query plan")
+
+
 admin.site.register(models.Project, ProjectAdmin)
 admin.site.register(models.Task, TaskAdmin)
 admin.site.register(models.ProjectLike, ProjectLikeAdmin)
+admin.site.register(models.Counter, CounterAdmin)
+admin.site.register(models.RequestProfile, RequestProfileAdmin)
+admin.site.register(models.SlowQuery, SlowQueryAdmin)
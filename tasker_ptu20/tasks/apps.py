@@ -6,3 +6,7 @@ class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
     verbose_name = _('tasks')
+
+    def ready(self) -> None:
+        from . import signals
+        return super().ready()
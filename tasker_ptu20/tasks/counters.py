@@ -0,0 +1,221 @@
+from collections import defaultdict
+from functools import partial
+from django.apps import apps as global_apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+GLOBAL, USER, PROJECT = 'global', 'user', 'project'
+FIELDS = ('tasks', 'undone', 'done', 'projects', 'likes')
+COUNTER_TIMEOUT = 300
+# counters are cached for everyone, so they are never read from a lagging replica
+PRIMARY = 'default'
+
+
+def cache_key(scope: str, object_id: int = 0) -> str:
+    return f"counters:{scope}:{object_id}"
+
+
+def _flush(cache_keys) -> None:
+    cache.delete_many(list(cache_keys))
+    cache.delete_prefix('dashboard')
+    cache.delete_prefix('projects')
+    cache.delete_prefix('page-list')
+
+
+def _flush_batch(batch: dict) -> None:
+    if not batch['flushed']:
+        batch['flushed'] = True
+        _flush(batch['keys'])
+
+
+def invalidate(*keys: tuple[str, int]) -> None:
+    """Drops cached counters and the pages showing them once the transaction commits.
+    Calls within one transaction share a batch, the first of their callbacks flushes it all.
+    """
+    cache_keys = {cache_key(*key) for key in keys}
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _flush(cache_keys)
+        return
+    batch = getattr(connection, 'counters_batch', None)
+    if batch is None or batch['flushed']:
+        batch = connection.counters_batch = {'keys': set(), 'flushed': False}
+    batch['keys'] |= cache_keys
+    transaction.on_commit(partial(_flush_batch, batch))
+
+
+def _model(name, apps=global_apps):
+    return apps.get_model('tasks', name)
+
+
+def _task_changes(state, sign):
+    owner_id, project_id, is_done = state
+    deltas = {'tasks': sign, 'done' if is_done else 'undone': sign}
+    return [(GLOBAL, 0, deltas), (USER, owner_id, deltas), (PROJECT, project_id, deltas)]
+
+
+def _project_changes(state, sign):
+    owner_id, = state
+    deltas = {'projects': sign}
+    return [(GLOBAL, 0, deltas), (USER, owner_id, deltas)]
+
+
+def _like_changes(state, sign):
+    project_id, user_id = state
+    deltas = {'likes': sign}
+    return [(GLOBAL, 0, deltas), (USER, user_id, deltas), (PROJECT, project_id, deltas)]
+
+
+CHANGES = {
+    'Task': _task_changes,
+    'Project': _project_changes,
+    'ProjectLike': _like_changes,
+}
+
+
+def count(scope: str, object_id: int = 0) -> dict[str, int]:
+    tasks = _model('Task').objects.using(PRIMARY)
+    projects = _model('Project').objects.using(PRIMARY)
+    likes = _model('ProjectLike').objects.using(PRIMARY)
+    if scope == USER:
+        tasks = tasks.filter(owner_id=object_id)
+        projects = projects.filter(owner_id=object_id)
+        likes = likes.filter(user_id=object_id)
+    elif scope == PROJECT:
+        tasks = tasks.filter(project_id=object_id)
+        projects = projects.none()
+        likes = likes.filter(project_id=object_id)
+    values = tasks.aggregate(
+        tasks=Count('pk'),
+        undone=Count('pk', filter=Q(is_done=False)),
+        done=Count('pk', filter=Q(is_done=True)),
+    )
+    values['projects'] = projects.count()
+    values['likes'] = likes.count()
+    return values
+
+
+def rebuild(scope: str, object_id: int = 0):
+    Counter = _model('Counter')
+    with transaction.atomic():
+        if scope == PROJECT and not _model('Project').objects.using(PRIMARY).filter(pk=object_id).exists():
+            Counter.objects.filter(scope=scope, object_id=object_id).delete()
+            invalidate((scope, object_id))
+            return None
+        counter, created = Counter.objects.update_or_create(
+            scope=scope, object_id=object_id, defaults=count(scope, object_id),
+        )
+        invalidate((scope, object_id))
+    return counter
+
+
+def get(scope: str, object_id: int = 0):
+    return get_many((scope, object_id))[scope, object_id]
+
+
+def get_many(*keys: tuple[str, int]) -> dict[tuple[str, int], object]:
+    cached = cache.get_many([cache_key(*key) for key in keys])
+    found = {key: cached[cache_key(*key)] for key in keys if cache_key(*key) in cached}
+    missing = [key for key in keys if key not in found]
+    if missing:
+        query = Q()
+        for scope, object_id in missing:
+            query |= Q(scope=scope, object_id=object_id)
+        loaded = {
+            (counter.scope, counter.object_id): counter
+            for counter in _model('Counter').objects.using(PRIMARY).filter(query)
+        }
+        for key in missing:
+            found[key] = loaded.get(key) or rebuild(*key)
+        cache.set_many({cache_key(*key): found[key] for key in missing if found[key]}, COUNTER_TIMEOUT)
+    return found
+
+
+def bump(scope: str, object_id: int = 0, **deltas: int) -> None:
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = _model('Counter').objects.filter(scope=scope, object_id=object_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        rebuild(scope, object_id)
+
+
+def track(model_name: str, old: tuple | None, new: tuple | None) -> None:
+    track_many(model_name, [(old, new)])
+
+
+def track_many(model_name: str, states: list[tuple[tuple | None, tuple | None]]) -> None:
+    track_counts(model_name, [
+        (state, sign)
+        for old, new in states if old != new
+        for state, sign in ((old, -1), (new, 1)) if state is not None
+    ])
+
+
+def track_counts(model_name: str, counts: list[tuple[tuple, int]]) -> None:
+    changes = CHANGES[model_name]
+    pending = defaultdict(lambda: defaultdict(int))
+    for state, number in counts:
+        for scope, object_id, deltas in changes(state, number):
+            for field, delta in deltas.items():
+                pending[scope, object_id][field] += delta
+    if not pending:
+        return
+    with transaction.atomic():
+        for (scope, object_id), deltas in pending.items():
+            bump(scope, object_id, **deltas)
+        invalidate(*pending)
+
+
+def track_deleted(model_name: str, queryset) -> None:
+    """Counts rows about to be deleted in one grouped query instead of one signal per row."""
+    rows = queryset.order_by().values_list(*queryset.model.tracked_fields).annotate(number=Count('pk'))
+    track_counts(model_name, [(row[:-1], -row[-1]) for row in rows])
+
+
+def rebuild_all(apps=global_apps) -> int:
+    Counter = _model('Counter', apps)
+    Task = _model('Task', apps)
+    Project = _model('Project', apps)
+    ProjectLike = _model('ProjectLike', apps)
+    # counted inside the IMMEDIATE transaction, so no write can land between the count and the rewrite
+    with transaction.atomic():
+        values = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+        values[GLOBAL, 0]
+        for project_id in Project.objects.values_list('pk', flat=True).iterator():
+            values[PROJECT, project_id]
+        task_counts = dict(
+            tasks=Count('pk'),
+            undone=Count('pk', filter=Q(is_done=False)),
+            done=Count('pk', filter=Q(is_done=True)),
+        )
+        values[GLOBAL, 0].update(Task.objects.aggregate(**task_counts))
+        for scope, field in ((USER, 'owner_id'), (PROJECT, 'project_id')):
+            for row in Task.objects.order_by().values(field).annotate(**task_counts):
+                values[scope, row.pop(field)].update(row)
+        for row in Project.objects.order_by().values('owner_id').annotate(projects=Count('pk')):
+            values[USER, row['owner_id']]['projects'] = row['projects']
+            values[GLOBAL, 0]['projects'] += row['projects']
+        for scope, field in ((USER, 'user_id'), (PROJECT, 'project_id')):
+            for row in ProjectLike.objects.order_by().values(field).annotate(likes=Count('pk')):
+                values[scope, row[field]]['likes'] = row['likes']
+                if scope == USER:
+                    values[GLOBAL, 0]['likes'] += row['likes']
+        existing = {
+            (row.pop('scope'), row.pop('object_id')): row
+            for row in Counter.objects.values('scope', 'object_id', *FIELDS)
+        }
+        changed = sum(1 for key, row in values.items() if existing.get(key) != row)
+        changed += sum(1 for key, row in existing.items() if key not in values and any(row.values()))
+        Counter.objects.all().delete()
+        Counter.objects.bulk_create(
+            [Counter(scope=scope, object_id=object_id, **row) for (scope, object_id), row in values.items()],
+            batch_size=1000,
+        )
+    if apps is global_apps:
+        cache.delete_prefix('counters')
+        cache.delete_prefix('dashboard')
+    return changed
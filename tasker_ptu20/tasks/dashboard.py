@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from tasker_ptu20.cache import single_flight
+from . import models, counters
+
+DASHBOARD_TIMEOUT = 60
+
+
+def get_dashboard_stats(user=None) -> dict[str, int]:
+    if user is not None and user.is_authenticated:
+        return single_flight(f'dashboard:user:{user.pk}', lambda: compute_dashboard_stats(user), DASHBOARD_TIMEOUT)
+    return single_flight('dashboard:global', compute_dashboard_stats, DASHBOARD_TIMEOUT)
+
+
+def compute_dashboard_stats(user=None) -> dict[str, int]:
+    authenticated = user is not None
+    keys = [(counters.GLOBAL, 0)]
+    if authenticated:
+        keys.append((counters.USER, user.pk))
+    found = counters.get_many(*keys)
+    common = found[counters.GLOBAL, 0]
+    stats = {
+        'users': get_user_model().objects.using(counters.PRIMARY).count(),
+        'projects': common.projects,
+        'tasks': common.tasks,
+        'undone_tasks': common.undone,
+        'done_tasks': common.done,
+    }
+    overdue = models.Task.objects.using(counters.PRIMARY).filter(is_done=False, deadline__lte=timezone.now())
+    overdue_aggregates = {'overdue_tasks': Count('pk')}
+    if authenticated:
+        personal = found[counters.USER, user.pk]
+        stats.update({
+            'user_projects': personal.projects,
+            'user_tasks': personal.tasks,
+            'user_undone_tasks': personal.undone,
+        })
+        overdue_aggregates['user_overdue_tasks'] = Count('pk', filter=Q(owner=user))
+    stats.update(overdue.aggregate(**overdue_aggregates))
+    return stats
+
+
+def get_common_dashboard(stats: dict[str, int]) -> list[tuple]:
+    return [
+        (_('users').title(), stats['users']),
+        (_('projects').title(), stats['projects'], reverse('project_list')),
+        (_('tasks').title(), stats['tasks'], reverse('task_list')),
+        (_('undone tasks').title(), stats['undone_tasks']),
+        (_('overdue tasks').title(), stats['overdue_tasks']),
+        (_('done tasks').title(), stats['done_tasks']),
+    ]
+
+
+def get_user_dashboard(stats: dict[str, int], user) -> list[tuple]:
+    return [
+        (
+            _('projects').title(),
+            stats['user_projects'],
+            reverse('project_list') + f"?owner={user.username}",
+        ),
+        (
+            _('tasks').title(),
+            stats['user_tasks'],
+            reverse('task_list') + f"?owner={user.username}",
+        ),
+        (_('undone tasks').title(), stats['user_undone_tasks']),
+        (_('overdue tasks').title(), stats['user_overdue_tasks']),
+    ]
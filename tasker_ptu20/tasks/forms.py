@@ -13,3 +13,10 @@ class TaskForm(forms.ModelForm):
         widgets = {
             'deadline': DateInput,
         }
+
+
+class ProjectLikeForm(forms.Form):
+    like_type = forms.TypedChoiceField(
+        choices=models.LIKE_TYPE_CHOICES, coerce=int, required=False,
+        empty_value=models.ProjectLike._meta.get_field('like_type').default,
+    )
@@ -0,0 +1,28 @@
+import time
+from django.core.cache import cache
+
+GENERATION_TIMEOUT = None
+
+
+def _generation_key(project_id: int) -> str:
+    return f"generation:project:{project_id}"
+
+
+def get(project_id: int) -> int:
+    generation = cache.get(_generation_key(project_id))
+    if generation is None:
+        generation = time.time_ns()
+        if not cache.add(_generation_key(project_id), generation, GENERATION_TIMEOUT):
+            generation = cache.get(_generation_key(project_id), generation)
+    return generation
+
+
+def bump(*project_ids: int) -> None:
+    cache.set_many({
+        _generation_key(project_id): time.time_ns()
+        for project_id in set(project_ids) if project_id
+    }, GENERATION_TIMEOUT)
+
+
+def key(project_id: int, name: str) -> str:
+    return f"project:{project_id}:{get(project_id)}:{name}"
@@ -0,0 +1,130 @@
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from tasker_ptu20.sqlite3.base import apply_pragmas
+from .benchmark_views import percentile
+
+PROFILES = {
+    'default': {
+        'pragmas': {'journal_mode': 'delete', 'synchronous': 'full'},
+        'persistent': False,
+        'begin': 'BEGIN',
+    },
+    'production': {
+        'pragmas': settings.SQLITE_PRAGMAS,
+        'persistent': True,
+        'begin': 'BEGIN IMMEDIATE',
+    },
+}
+READ_SQL = (
+    "SELECT id, name, description, project_id, owner_id, is_done, deadline FROM tasks_task WHERE id = ?",
+    "SELECT id, name, is_done, deadline FROM tasks_task WHERE project_id = ? LIMIT 20",
+    "SELECT tasks, undone, done, projects, likes FROM tasks_counter WHERE scope = 'global'",
+)
+WRITE_SQL = (
+    "UPDATE tasks_task SET is_done = NOT is_done, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+    "UPDATE tasks_counter SET done = done + 1 WHERE scope = 'global'",
+)
+
+
+def connect(path: str, profile: dict) -> sqlite3.Connection:
+    database = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(database, {name: value for name, value in profile['pragmas'].items() if name != 'journal_mode'})
+    return database
+
+
+def run_worker(path: str, profile_name: str, duration: float, write_ratio: float, seed: int) -> dict:
+    profile = PROFILES[profile_name]
+    generator = random.Random(seed)
+    database = connect(path, profile)
+    max_id, = database.execute("SELECT MAX(id) FROM tasks_task").fetchone()
+    max_project_id, = database.execute("SELECT MAX(id) FROM tasks_project").fetchone()
+    timings = {'read': [], 'write': []}
+    errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        kind = 'write' if generator.random() < write_ratio else 'read'
+        started = time.perf_counter()
+        if not profile['persistent']:
+            database.close()
+            database = connect(path, profile)
+        try:
+            if kind == 'read':
+                database.execute(READ_SQL[0], (generator.randint(1, max_id), )).fetchall()
+                database.execute(READ_SQL[1], (generator.randint(1, max_project_id), )).fetchall()
+                database.execute(READ_SQL[2]).fetchall()
+            else:
+                database.execute(profile['begin'])
+                database.execute(WRITE_SQL[0], (generator.randint(1, max_id), ))
+                database.execute(WRITE_SQL[1])
+                database.execute("COMMIT")
+        except sqlite3.OperationalError:
+            errors += 1
+            if database.in_transaction:
+                database.execute("ROLLBACK")
+            continue
+        timings[kind].append(time.perf_counter() - started)
+    database.close()
+    return {'timings': timings, 'errors': errors}
+
+
+class Command(BaseCommand):
+    help = "Compare mixed read/write throughput of the default and production SQLite profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=5, help="seconds per profile")
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+        parser.add_argument('--seed', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("This benchmark needs a SQLite default database.")
+        if connection.in_atomic_block:
+            raise CommandError("The database copy cannot be taken inside a transaction.")
+        connection.ensure_connection()
+        report = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name in PROFILES:
+                path = str(Path(directory, f"{name}.sqlite3"))
+                copy = sqlite3.connect(path)
+                connection.connection.backup(copy)
+                apply_pragmas(copy, PROFILES[name]['pragmas'])
+                copy.close()
+                report[name] = self.run_profile(path, name, options)
+                self.stderr.write(
+                    f"{name}: {report[name]['requests_per_second']} req/s, {report[name]['errors']} errors"
+                )
+        report['speedup'] = round(
+            report['production']['requests_per_second'] / max(report['default']['requests_per_second'], 0.1), 2
+        )
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run_profile(self, path: str, name: str, options) -> dict:
+        processes = options['processes']
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(
+                run_worker,
+                [path] * processes,
+                [name] * processes,
+                [options['duration']] * processes,
+                [options['write_ratio']] * processes,
+                [options['seed'] + number for number in range(processes)],
+            ))
+        reads = [timing for result in results for timing in result['timings']['read']]
+        writes = [timing for result in results for timing in result['timings']['write']]
+        return {
+            'reads': len(reads),
+            'writes': len(writes),
+            'errors': sum(result['errors'] for result in results),
+            'requests_per_second': round((len(reads) + len(writes)) / options['duration'], 1),
+            'read_p95_ms': round(percentile(reads, 95) * 1000, 2) if reads else None,
+            'write_p95_ms': round(percentile(writes, 95) * 1000, 2) if writes else None,
+        }
@@ -0,0 +1,184 @@
+import json
+import math
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from importlib import import_module
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from customer_support.models import Ticket
+from ... import models
+
+URL_MODULES = ('tasks.urls', 'user_profile.urls', 'customer_support.urls')
+WRITE_VIEWS = ('task_done', 'project_like')
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * percent / 100) - 1)]
+
+
+def init_worker() -> None:
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def run_requests(path: str, user_pk: int | None, host: str, iterations: int, warmup: int) -> tuple:
+    client = Client(SERVER_NAME=host)
+    if user_pk:
+        client.force_login(get_user_model().objects.get(pk=user_pk))
+    for _ in range(warmup):
+        client.get(path)
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    timings, query_counts, statuses = [], [], Counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(count_queries))
+        for _ in range(iterations):
+            queries = 0
+            started = time.perf_counter()
+            response = client.get(path)
+            timings.append(time.perf_counter() - started)
+            query_counts.append(queries)
+            statuses[response.status_code] += 1
+    return timings, query_counts, dict(statuses)
+
+
+class Command(BaseCommand):
+    help = "Benchmark every tasks, user_profile and customer_support view with the test client and report JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="username to log in as, defaults to the owner of the newest task")
+        parser.add_argument('--anonymous', action='store_true')
+        parser.add_argument('--views', nargs='*', help="URL names to benchmark, defaults to all")
+        parser.add_argument('--include-writes', action='store_true', help=f"also run {', '.join(WRITE_VIEWS)}")
+        parser.add_argument('--iterations', type=int, default=50, help="requests per view and process")
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--processes', type=int, default=4, help="0 runs in this process")
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+        parser.add_argument('--baseline', help="previous JSON report to compare p95 and query counts with")
+        parser.add_argument('--tolerance', type=float, default=0.25, help="allowed p95 slowdown ratio")
+
+    def handle(self, *args, **options):
+        user = None if options['anonymous'] else self.get_user(options['user'])
+        urls = self.get_urls(user, options['views'], options['include_writes'])
+        connections.close_all()
+        executor = None
+        if options['processes']:
+            executor = ProcessPoolExecutor(max_workers=options['processes'], initializer=init_worker)
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'user': user.username if user else None,
+            'processes': options['processes'],
+            'iterations': options['iterations'],
+            'views': {},
+        }
+        try:
+            for name, path in urls:
+                report['views'][name] = self.benchmark(executor, path, user, options)
+                self.stderr.write(
+                    f"{name}: p95 {report['views'][name]['p95_ms']}ms, "
+                    f"{report['views'][name]['throughput_rps']} req/s"
+                )
+        finally:
+            if executor:
+                executor.shutdown()
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output)
+        else:
+            self.stdout.write(output)
+        if options['baseline']:
+            self.compare(report, options['baseline'], options['tolerance'])
+
+    def get_user(self, username: str | None):
+        if username:
+            return get_user_model().objects.get(username=username)
+        task = models.Task.objects.select_related('owner').order_by('-pk').first()
+        if task is None:
+            raise CommandError("No tasks found, seed the database first with seed_tasker.")
+        return task.owner
+
+    def get_urls(self, user, names: list[str] | None, include_writes: bool) -> list[tuple[str, str]]:
+        samples = {}
+        owner = {'owner': user} if user else {}
+        project = models.Project.objects.filter(**owner).order_by('-pk').first()
+        task = models.Task.objects.filter(**owner).order_by('-pk').first()
+        ticket = Ticket.objects.filter(sender=user).order_by('-pk').first() if user else None
+        for prefix, obj in (('project', project), ('task', task), ('ticket', ticket)):
+            if obj:
+                samples[prefix] = obj.pk
+        urls = []
+        for module in URL_MODULES:
+            for pattern in import_module(module).urlpatterns:
+                if names and pattern.name not in names:
+                    continue
+                if pattern.name in WRITE_VIEWS and not include_writes:
+                    continue
+                kwargs = {}
+                for argument in pattern.pattern.converters:
+                    if argument == 'username':
+                        kwargs[argument] = user.username if user else get_user_model().objects.first().username
+                    elif pattern.name.split('_')[0] in samples:
+                        kwargs[argument] = samples[pattern.name.split('_')[0]]
+                if len(kwargs) < len(pattern.pattern.converters):
+                    self.stderr.write(f"{pattern.name}: skipped, no sample object")
+                    continue
+                urls.append((pattern.name, reverse(pattern.name, kwargs=kwargs)))
+        return urls
+
+    def benchmark(self, executor, path: str, user, options) -> dict:
+        arguments = (path, user.pk if user else None, options['host'], options['iterations'], options['warmup'])
+        started = time.perf_counter()
+        if executor:
+            results = list(executor.map(run_requests, *zip(*[arguments] * options['processes'])))
+        else:
+            results = [run_requests(*arguments)]
+        elapsed = time.perf_counter() - started
+        timings = [timing for result in results for timing in result[0]]
+        queries = [count for result in results for count in result[1]]
+        statuses = Counter()
+        for result in results:
+            statuses.update(result[2])
+        return {
+            'path': path,
+            'requests': len(timings),
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            'mean_ms': round(sum(timings) / len(timings) * 1000, 2),
+            'p50_ms': round(percentile(timings, 50) * 1000, 2),
+            'p95_ms': round(percentile(timings, 95) * 1000, 2),
+            'p99_ms': round(percentile(timings, 99) * 1000, 2),
+            'throughput_rps': round(len(timings) / elapsed, 1),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+        }
+
+    def compare(self, report: dict, baseline_path: str, tolerance: float) -> None:
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['views']
+        regressions = []
+        for name, result in report['views'].items():
+            previous = baseline.get(name)
+            if not previous:
+                continue
+            if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {result['p95_ms']}ms")
+            if result['queries_max'] > previous['queries_max']:
+                regressions.append(f"{name}: queries {previous['queries_max']} -> {result['queries_max']}")
+        if regressions:
+            raise CommandError("Regressions found:\n" + "\n".join(regressions))
+        self.stderr.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from ... import counters
+
+
+class Command(BaseCommand):
+    help = "Recount tasks, projects and likes and repair drifted counters"
+
+    def handle(self, *args, **options):
+        changed = counters.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Counters rebuilt, {changed} drifted rows repaired."))
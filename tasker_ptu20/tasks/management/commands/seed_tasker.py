@@ -0,0 +1,160 @@
+import random
+from datetime import timedelta
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from django.utils import timezone
+from customer_support.models import SUBJECT_CHOICES, TICKET_STATUSES, Ticket, TicketMessage
+from user_profile.models import Profile
+from ... import counters, models, search
+
+WORDS = (
+    'alpha', 'backlog', 'cleanup', 'deploy', 'design', 'docs', 'export', 'feature', 'fix', 'import',
+    'invoice', 'migrate', 'monitor', 'onboarding', 'refactor', 'release', 'report', 'review', 'search',
+    'security', 'sprint', 'support', 'test', 'upgrade',
+)
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Populate the database with generated users, projects, tasks, likes and support tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--projects', type=int, default=500)
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--likes', type=int, default=2000)
+        parser.add_argument('--tickets', type=int, default=500)
+        parser.add_argument('--messages', type=int, default=3, help="messages per ticket")
+        parser.add_argument('--done-ratio', type=float, default=0.6)
+        parser.add_argument('--password', default='tasker')
+        parser.add_argument('--seed', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        user_ids = self.create_users(options['users'], options['password'])
+        project_ids = self.create_projects(options['projects'], user_ids)
+        self.create_tasks(options['tasks'], project_ids, options['done_ratio'])
+        self.create_likes(options['likes'], project_ids, user_ids)
+        self.create_tickets(options['tickets'], options['messages'], user_ids)
+        counters.rebuild_all()
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS("Seeding finished, counters rebuilt."))
+
+    def create(self, model, objects) -> list[int]:
+        pks = []
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic(using=router.db_for_write(model)):
+                pks.extend(obj.pk for obj in model.objects.bulk_create(batch))
+        self.stdout.write(f"{model._meta.verbose_name_plural}: {len(pks)}")
+        return pks
+
+    def words(self, count: int) -> str:
+        return " ".join(self.random.choice(WORDS) for _ in range(count))
+
+    def create_users(self, count: int, password: str) -> list[int]:
+        User = get_user_model()
+        start = User.objects.count()
+        password = make_password(password)
+        user_ids = self.create(User, (
+            User(
+                username=f"seed{number}",
+                email=f"seed{number}@example.com",
+                first_name=self.random.choice(WORDS).title(),
+                last_name=f"Seed{number}",
+                password=password,
+            ) for number in range(start, start + count)
+        ))
+        self.create(Profile, (Profile(user_id=user_id) for user_id in user_ids))
+        return user_ids
+
+    def create_projects(self, count: int, user_ids: list[int]) -> list[int]:
+        return self.create(models.Project, (
+            models.Project(
+                name=self.words(2).capitalize(),
+                owner_id=self.random.choice(user_ids),
+                description=f"<p>{self.words(12)}</p>",
+            ) for _ in range(count)
+        ))
+
+    def create_tasks(self, count: int, project_ids: list[int], done_ratio: float) -> None:
+        owners = dict(models.Project.objects.filter(pk__in=project_ids).values_list('pk', 'owner_id'))
+        total = 0
+        for batch in batched(range(count), self.batch_size):
+            tasks = []
+            for _ in batch:
+                project_id = self.random.choice(project_ids)
+                deadline = None
+                if self.random.random() < 0.7:
+                    deadline = self.now + timedelta(hours=self.random.randint(-24 * 60, 24 * 90))
+                tasks.append(models.Task(
+                    name=self.words(3).capitalize(),
+                    description=f"<p>{self.words(20)}</p>",
+                    project_id=project_id,
+                    owner_id=owners[project_id],
+                    is_done=self.random.random() < done_ratio,
+                    deadline=deadline,
+                ))
+            with transaction.atomic():
+                tasks = models.Task.objects.bulk_create(tasks)
+                search.index_tasks([(task.pk, task.name, task.description) for task in tasks])
+            total += len(tasks)
+        self.stdout.write(f"{models.Task._meta.verbose_name_plural}: {total}")
+
+    def create_likes(self, count: int, project_ids: list[int], user_ids: list[int]) -> None:
+        count = min(count, len(project_ids) * len(user_ids))
+        pairs = set()
+        while len(pairs) < count:
+            pairs.add((self.random.choice(project_ids), self.random.choice(user_ids)))
+        likes = (
+            models.ProjectLike(
+                project_id=project_id,
+                user_id=user_id,
+                like_type=self.random.choice(models.LIKE_TYPE_CHOICES)[0],
+            ) for project_id, user_id in sorted(pairs)
+        )
+        for batch in batched(likes, self.batch_size):
+            with transaction.atomic():
+                models.ProjectLike.objects.bulk_create(batch, ignore_conflicts=True)
+        self.stdout.write(f"{models.ProjectLike._meta.verbose_name_plural}: {count}")
+
+    def create_tickets(self, count: int, messages: int, user_ids: list[int]) -> None:
+        users = {
+            user['pk']: user
+            for user in get_user_model().objects.filter(pk__in=user_ids).values('pk', 'email', 'first_name', 'last_name')
+        }
+        subjects = [subject for subject, label in SUBJECT_CHOICES if subject]
+        statuses = [status for status, label in TICKET_STATUSES]
+        senders = [self.random.choice(user_ids) for _ in range(count)]
+        ticket_ids = self.create(Ticket, (
+            Ticket(
+                subject=self.random.choice(subjects),
+                body=self.words(30),
+                sender_id=sender_id,
+                sender_email=users[sender_id]['email'],
+                sender_name=f"{users[sender_id]['first_name']} {users[sender_id]['last_name']}",
+                status=self.random.choice(statuses),
+                mail_sent=True,
+            ) for sender_id in senders
+        ))
+        self.create(TicketMessage, (
+            TicketMessage(
+                ticket_id=ticket_id,
+                body=self.words(15),
+                sender_id=sender_id,
+                sender_email=users[sender_id]['email'],
+                mail_sent=True,
+                is_read=self.random.random() < 0.5,
+            ) for ticket_id, sender_id in zip(ticket_ids, senders) for _ in range(messages)
+        ))
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from tasker_ptu20.routers import REPLICA
+
+
+class Command(BaseCommand):
+    help = "Copy the default SQLite database to the replica with the online backup API"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help="keep syncing every N seconds")
+        parser.add_argument('--pages', type=int, default=-1, help="pages per backup step, -1 copies at once")
+
+    def handle(self, *args, **options):
+        source, target = connections['default'], connections[REPLICA]
+        if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+            raise CommandError("sync_replica only copies SQLite databases.")
+        if source.settings_dict['NAME'] == target.settings_dict['NAME']:
+            raise CommandError("The replica points at the default database.")
+        while True:
+            started = time.perf_counter()
+            source.ensure_connection()
+            target.ensure_connection()
+            source.connection.backup(target.connection, pages=options['pages'])
+            self.stdout.write(f"Replica synced in {(time.perf_counter() - started) * 1000:.0f}ms.")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
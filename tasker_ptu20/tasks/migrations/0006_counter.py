@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-16 23:00
+
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    from tasks import counters
+    counters.rebuild_all(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_projectlike_like_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('global', 'global'), ('user', 'user'), ('project', 'project')], max_length=10, verbose_name='scope')),
+                ('object_id', models.PositiveBigIntegerField(default=0, verbose_name='object ID')),
+                ('tasks', models.IntegerField(default=0, verbose_name='tasks')),
+                ('undone', models.IntegerField(default=0, verbose_name='undone tasks')),
+                ('done', models.IntegerField(default=0, verbose_name='done tasks')),
+                ('projects', models.IntegerField(default=0, verbose_name='projects')),
+                ('likes', models.IntegerField(default=0, verbose_name='likes')),
+            ],
+            options={
+                'verbose_name': 'counter',
+                'verbose_name_plural': 'counters',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='counter',
+            constraint=models.UniqueConstraint(fields=('scope', 'object_id'), name='unique_counter_scope_object'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-16 23:20
+
+from django.db import migrations
+
+
+def create_task_fts(apps, schema_editor):
+    from tasks import search
+    if not search.create_index(schema_editor.connection):
+        return
+    Task = apps.get_model('tasks', 'Task')
+    rows = Task.objects.using(schema_editor.connection.alias).values_list('pk', 'name', 'description')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {search.FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)",
+            [(pk, name, search.plain_text(description)) for pk, name, description in rows.iterator()],
+        )
+
+
+def drop_task_fts(apps, schema_editor):
+    from tasks import search
+    search.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_task_fts, drop_task_fts),
+    ]
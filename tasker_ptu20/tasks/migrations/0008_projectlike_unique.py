@@ -0,0 +1,30 @@
+# Generated by Django 5.0 on 2026-10-16 23:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_likes(apps, schema_editor):
+    from tasks import counters
+    ProjectLike = apps.get_model('tasks', 'ProjectLike')
+    keep = ProjectLike.objects.values('project', 'user', 'like_type').annotate(keep_id=models.Min('id'))
+    keep_ids = [row['keep_id'] for row in keep]
+    deleted, _deleted_by_model = ProjectLike.objects.exclude(id__in=keep_ids).delete()
+    if deleted:
+        counters.rebuild_all(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_likes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='projectlike',
+            constraint=models.UniqueConstraint(fields=('project', 'user', 'like_type'), name='unique_project_like'),
+        ),
+    ]
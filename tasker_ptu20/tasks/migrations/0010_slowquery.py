@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-16 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_requestprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created at')),
+                ('duration_ms', models.FloatField(db_index=True, verbose_name='duration, ms')),
+                ('source', models.CharField(blank=True, db_index=True, max_length=150, verbose_name='source')),
+                ('path', models.CharField(blank=True, max_length=255, verbose_name='path')),
+                ('database', models.CharField(max_length=50, verbose_name='database')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('params', models.TextField(blank=True, verbose_name='parameters')),
+                ('plan', models.TextField(blank=True, verbose_name='query plan')),
+                ('full_scan', models.BooleanField(db_index=True, default=False, verbose_name='full scan')),
+            ],
+            options={
+                'verbose_name': 'slow query',
+                'verbose_name_plural': 'slow queries',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0 on 2026-10-17 00:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# covered by the leading columns of the 0011 indexes, dropped by name so SQLite does not rebuild tasks_task
+REDUNDANT_INDEXES = {
+    'tasks_task_is_done_dd983862': 'is_done',
+    'tasks_task_deadline_46a92578': 'deadline',
+    'tasks_task_owner_id_db3dcc3e': 'owner_id',
+    'tasks_task_project_id_a2815f0c': 'project_id',
+}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_task_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    f'DROP INDEX IF EXISTS "{name}"',
+                    f'CREATE INDEX "{name}" ON "tasks_task" ("{column}")',
+                )
+                for name, column in REDUNDANT_INDEXES.items()
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='task',
+                    name='deadline',
+                    field=models.DateTimeField(blank=True, null=True, verbose_name='deadline'),
+                ),
+                migrations.AlterField(
+                    model_name='task',
+                    name='is_done',
+                    field=models.BooleanField(default=False, verbose_name='is done'),
+                ),
+                migrations.AlterField(
+                    model_name='task',
+                    name='owner',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to=settings.AUTH_USER_MODEL, verbose_name='owner'),
+                ),
+                migrations.AlterField(
+                    model_name='task',
+                    name='project',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='tasks.project', verbose_name='project'),
+                ),
+            ],
+        ),
+    ]
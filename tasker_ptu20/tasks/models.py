@@ -1,11 +1,74 @@
+import os
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import gettext as _
 from tinymce.models import HTMLField
 
+post_update = Signal()
 
-class Project(models.Model):
+
+class TrackedQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            previous = list(self.values_list('pk', *self.model.tracked_fields))
+            rows = super().update(**kwargs)
+            if rows:
+                post_update.send(sender=self.model, previous=previous, fields=set(kwargs), using=self.db)
+        return rows
+
+
+class TrackedModel(models.Model):
+    tracked_fields: tuple[str, ...] = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(field in field_names for field in cls.tracked_fields):
+            instance._loaded_state = instance.get_tracked_state()
+        return instance
+
+    def get_tracked_state(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.tracked_fields)
+
+
+class TaskQuerySet(TrackedQuerySet):
+    def update(self, **kwargs):
+        # rendered task rows are cached by updated_at, which auto_now only sets in save()
+        kwargs.setdefault('updated_at', timezone.now())
+        return super().update(**kwargs)
+
+    def search(self, text: str):
+        from .search import search
+        return search(self, text)
+
+
+class ProjectQuerySet(TrackedQuerySet):
+    def with_task_stats(self, recent_tasks: int = 3):
+        counter = Counter.objects.filter(scope='project', object_id=models.OuterRef('pk'))
+        queryset = self.annotate(
+            total_tasks=Coalesce(models.Subquery(counter.values('tasks')[:1]), 0),
+            undone_tasks=Coalesce(models.Subquery(counter.values('undone')[:1]), 0),
+            total_likes=Coalesce(models.Subquery(counter.values('likes')[:1]), 0),
+        )
+        if recent_tasks:
+            queryset = queryset.prefetch_related(models.Prefetch(
+                'tasks',
+                queryset=Task.objects.order_by('-created_at').only('name', 'project')[:recent_tasks],
+                to_attr='recent_task_list',
+            ))
+        return queryset
+
+
+class Project(TrackedModel):
     name = models.CharField(_("name"), max_length=100, db_index=True)
     owner = models.ForeignKey(
         get_user_model(), 
@@ -21,6 +84,9 @@ class Project(models.Model):
         help_text=_("from Youtube's video URL copy the part after 'https://www.youtube.com/watch?v='.")
     )
 
+    objects = ProjectQuerySet.as_manager()
+    tracked_fields = ('owner_id', )
+
     class Meta:
         verbose_name = _("project")
         verbose_name_plural = _("projects")
@@ -37,7 +103,7 @@ class Project(models.Model):
         return self.likes.values('like_type').annotate(count=models.Count('user'))
 
 
-class Task(models.Model):
+class Task(TrackedModel):
     name = models.CharField(_("name"), max_length=100, db_index=True)
     description = HTMLField(max_length=10000, null=True, blank=True)
     project = models.ForeignKey(
@@ -45,22 +111,36 @@ class Task(models.Model):
         verbose_name=_("project"), 
         on_delete=models.CASCADE,
         related_name='tasks',
+        db_index=False,
     )
     owner = models.ForeignKey(
         get_user_model(), 
         verbose_name=_("owner"), 
         on_delete=models.CASCADE,
-        related_name='tasks'
+        related_name='tasks',
+        db_index=False,
     )
     created_at = models.DateTimeField(_("created at"), auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(_("updated at"), auto_now=True, db_index=True)
-    is_done = models.BooleanField(_("is done"), default=False, db_index=True)
-    deadline = models.DateTimeField(_("deadline"), null=True, blank=True, db_index=True)
+    is_done = models.BooleanField(_("is done"), default=False)
+    deadline = models.DateTimeField(_("deadline"), null=True, blank=True)
+
+    objects = TaskQuerySet.as_manager()
+    tracked_fields = ('owner_id', 'project_id', 'is_done', )
 
     class Meta:
         verbose_name = _("task")
         verbose_name_plural = _("tasks")
         ordering = ['is_done', '-created_at']
+        # owner, project and is_done lead the indexes below, so they have no single-column index
+        indexes = [
+            # task lists in the default ordering, alone or filtered by owner or project
+            models.Index(fields=['is_done', '-created_at'], name='task_done_created_idx'),
+            models.Index(fields=['owner', 'is_done', '-created_at'], name='task_owner_done_created_idx'),
+            models.Index(fields=['project', 'is_done', '-created_at'], name='task_project_done_created_idx'),
+            # overdue counts on the dashboard, global and per owner
+            models.Index(fields=['deadline', 'owner'], condition=models.Q(is_done=False), name='task_open_deadline_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -79,7 +159,7 @@ LIKE_TYPE_CHOICES = (
 )
 
 
-class ProjectLike(models.Model):
+class ProjectLike(TrackedModel):
     project = models.ForeignKey(
         Project, 
         verbose_name=_("project"), 
@@ -94,12 +174,103 @@ class ProjectLike(models.Model):
     )
     like_type = models.IntegerField(_("type"), choices=LIKE_TYPE_CHOICES, default=3)
 
+    objects = TrackedQuerySet.as_manager()
+    tracked_fields = ('project_id', 'user_id', )
+
     class Meta:
         verbose_name = _("project like")
         verbose_name_plural = _("project likes")
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'user', 'like_type'], name='unique_project_like'),
+        ]
 
     def __str__(self):
         return f"{self.project} {self.user}"
 
     def get_absolute_url(self):
         return reverse("project_like_detail", kwargs={"pk": self.pk})
+
+
+COUNTER_SCOPES = (
+    ('global', _('global')),
+    ('user', _('user')),
+    ('project', _('project')),
+)
+
+
+class Counter(models.Model):
+    scope = models.CharField(_("scope"), max_length=10, choices=COUNTER_SCOPES)
+    object_id = models.PositiveBigIntegerField(_("object ID"), default=0)
+    tasks = models.IntegerField(_("tasks"), default=0)
+    undone = models.IntegerField(_("undone tasks"), default=0)
+    done = models.IntegerField(_("done tasks"), default=0)
+    projects = models.IntegerField(_("projects"), default=0)
+    likes = models.IntegerField(_("likes"), default=0)
+
+    class Meta:
+        verbose_name = _("counter")
+        verbose_name_plural = _("counters")
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'object_id'], name='unique_counter_scope_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.object_id}"
+
+
+class ProfileStorage(FileSystemStorage):
+    @property
+    def base_location(self):
+        return settings.PROFILE_DIR
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+def profile_storage():
+    return ProfileStorage()
+
+
+class RequestProfile(models.Model):
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True, db_index=True)
+    method = models.CharField(_("method"), max_length=10)
+    path = models.CharField(_("path"), max_length=255)
+    view_name = models.CharField(_("view"), max_length=100, blank=True, db_index=True)
+    user = models.ForeignKey(
+        get_user_model(),
+        verbose_name=_("user"),
+        on_delete=models.SET_NULL,
+        related_name='request_profiles',
+        null=True, blank=True,
+    )
+    duration_ms = models.FloatField(_("duration, ms"))
+    dump = models.FileField(_("pstats dump"), storage=profile_storage)
+
+    class Meta:
+        verbose_name = _("request profile")
+        verbose_name_plural = _("request profiles")
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} {self.duration_ms:.0f}ms"
+
+
+class SlowQuery(models.Model):
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True, db_index=True)
+    duration_ms = models.FloatField(_("duration, ms"), db_index=True)
+    source = models.CharField(_("source"), max_length=150, blank=True, db_index=True)
+    path = models.CharField(_("path"), max_length=255, blank=True)
+    database = models.CharField(_("database"), max_length=50)
+    sql = models.TextField(_("SQL"))
+    params = models.TextField(_("parameters"), blank=True)
+    plan = models.TextField(_("query plan"), blank=True)
+    full_scan = models.BooleanField(_("full scan"), default=False, db_index=True)
+
+    class Meta:
+        verbose_name = _("slow query")
+        verbose_name_plural = _("slow queries")
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f}ms {self.sql[:80]}"
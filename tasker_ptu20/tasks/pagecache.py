@@ -0,0 +1,54 @@
+import hashlib
+from functools import wraps
+from typing import Callable
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from tasker_ptu20.cache import single_flight
+from tasker_ptu20.routers import primary
+
+PAGE_TIMEOUT = 60
+# flushed by every counter change, pages with a generation variant go in DETAIL_PAGES instead
+LIST_PAGES = 'page-list'
+DETAIL_PAGES = 'page-detail'
+
+
+def is_cacheable_request(request: HttpRequest) -> bool:
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+def is_cacheable_response(response: HttpResponse) -> bool:
+    return response.status_code == 200 and not response.cookies
+
+
+def page_cache_key(request: HttpRequest, variant: str = '', namespace: str = LIST_PAGES) -> str:
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"{namespace}:{request.LANGUAGE_CODE}:{variant}:{path}"
+
+
+def cache_anonymous_page(
+        timeout: int = PAGE_TIMEOUT,
+        variant: Callable[..., str] | None = None,
+        namespace: str = LIST_PAGES,
+    ):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            if not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(request, variant(request, *args, **kwargs) if variant else '', namespace)
+
+            # stored pages are keyed by fresh generations, so they are never rendered from a lagging replica
+            def render() -> HttpResponse:
+                with primary():
+                    response = view(request, *args, **kwargs)
+                    if hasattr(response, 'render') and not response.is_rendered:
+                        response.render()
+                return response
+
+            return single_flight(key, render, timeout, should_store=is_cacheable_response)
+        return wrapper
+    return decorator
@@ -0,0 +1,103 @@
+import base64
+import binascii
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q, QuerySet
+
+
+class KeysetPage(list):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list)
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self) -> str | None:
+        if self._has_next and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[-1], reverse=False)
+
+    @property
+    def previous_cursor(self) -> str | None:
+        if self._has_previous and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[0], reverse=True)
+
+
+class KeysetPaginator:
+    keyset = True
+
+    def __init__(self, queryset: QuerySet, per_page: int):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('pk')
+        self.ordering = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+    def _field(self, name: str):
+        opts = self.queryset.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _to_string(self, obj, name: str):
+        try:
+            return self._field(name).value_to_string(obj)
+        except FieldDoesNotExist:
+            return getattr(obj, name)
+
+    def _to_python(self, name: str, value):
+        try:
+            return self._field(name).to_python(value)
+        except FieldDoesNotExist:
+            return value
+
+    def encode_cursor(self, obj, reverse: bool) -> str:
+        values = [self._to_string(obj, name) for name, descending in self.ordering]
+        payload = json.dumps({'r': reverse, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> tuple[bool, list] | None:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            values = [
+                self._to_python(name, value)
+                for (name, descending), value in zip(self.ordering, payload['v'], strict=True)
+            ]
+            return bool(payload['r']), values
+        except (binascii.Error, ValueError, KeyError, TypeError, ValidationError):
+            return None
+
+    def _seek(self, values: list, reverse: bool) -> Q:
+        condition = Q()
+        for index, (name, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != reverse else 'gt'
+            equal = {previous: values[position] for position, (previous, _) in enumerate(self.ordering[:index])}
+            condition |= Q(**equal, **{f"{name}__{lookup}": values[index]})
+        return condition
+
+    def get_page(self, cursor: str | None) -> KeysetPage:
+        decoded = self.decode_cursor(cursor) if cursor else None
+        queryset = self.queryset
+        reverse = False
+        if decoded:
+            reverse, values = decoded
+            queryset = queryset.filter(self._seek(values, reverse))
+        order_by = [
+            f"{'-' if descending != reverse else ''}{name}" for name, descending in self.ordering
+        ]
+        object_list = list(queryset.order_by(*order_by)[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if reverse:
+            object_list.reverse()
+            return KeysetPage(object_list, self, has_next=True, has_previous=has_more)
+        return KeysetPage(object_list, self, has_next=has_more, has_previous=bool(decoded))
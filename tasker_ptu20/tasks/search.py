@@ -0,0 +1,93 @@
+import html
+from django.db import connections, DEFAULT_DB_ALIAS, OperationalError
+from django.db.models import QuerySet
+from django.db.models.expressions import RawSQL
+from django.utils.html import strip_tags
+
+FTS_TABLE = 'tasks_task_fts'
+_available: dict[str, bool] = {}
+
+
+def fts_available(using: str = DEFAULT_DB_ALIAS) -> bool:
+    if using not in _available:
+        connection = connections[using]
+        if connection.vendor != 'sqlite':
+            _available[using] = False
+        else:
+            with connection.cursor() as cursor:
+                _available[using] = FTS_TABLE in connection.introspection.table_names(cursor)
+    return _available[using]
+
+
+def forget_available(using: str | None = None) -> None:
+    if using is None:
+        _available.clear()
+    else:
+        _available.pop(using, None)
+
+
+def create_index(connection) -> bool:
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                "USING fts5(name, description, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+    except OperationalError:
+        return False
+    forget_available(connection.alias)
+    return True
+
+
+def drop_index(connection) -> None:
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        forget_available(connection.alias)
+
+
+def plain_text(value: str | None) -> str:
+    return html.unescape(strip_tags(value or ''))
+
+
+def index_tasks(rows: list[tuple[int, str, str | None]], using: str = DEFAULT_DB_ALIAS) -> None:
+    if not rows or not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk, ) for pk, name, description in rows])
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)",
+            [(pk, name, plain_text(description)) for pk, name, description in rows],
+        )
+
+
+def remove_tasks(pks: list[int], using: str = DEFAULT_DB_ALIAS) -> None:
+    if not pks or not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk, ) for pk in pks])
+
+
+def build_match(text: str) -> str:
+    terms = ['"{}"*'.format(term.replace('"', '""')) for term in text.split()]
+    return " ".join(terms)
+
+
+def search(queryset: QuerySet, text: str) -> QuerySet:
+    match = build_match(text)
+    if not match:
+        return queryset
+    if not fts_available(queryset.db):
+        return queryset.filter(name__icontains=text)
+    table = queryset.model._meta.db_table
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match, ))
+    ).annotate(
+        search_rank=RawSQL(
+            f"SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id",
+            (match, ),
+        ),
+    ).order_by('search_rank', 'pk')
@@ -0,0 +1,176 @@
+from contextvars import ContextVar
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, post_migrate
+from django.dispatch import receiver
+from . import models, counters, search, generations
+
+# rows of a project or user being deleted, mapped to the atomic block of that deletion
+_cascades = ContextVar('delete_cascades', default={})
+
+
+@receiver(pre_save, sender=models.Task)
+@receiver(pre_save, sender=models.Project)
+@receiver(pre_save, sender=models.ProjectLike)
+def remember_previous_state(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance._previous_state = None
+    elif getattr(instance, '_loaded_state', None) is not None:
+        instance._previous_state = instance._loaded_state
+    else:
+        instance._previous_state = sender.objects.filter(pk=instance.pk).values_list(
+            *sender.tracked_fields
+        ).first()
+
+
+@receiver(post_save, sender=models.Task)
+@receiver(post_save, sender=models.Project)
+@receiver(post_save, sender=models.ProjectLike)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    state = instance.get_tracked_state()
+    counters.track(sender.__name__, None if created else instance._previous_state, state)
+    if created and sender is models.Project:
+        models.Counter.objects.get_or_create(scope=counters.PROJECT, object_id=instance.pk)
+    instance._loaded_state = state
+
+
+def _cascade_keys(sender, instance) -> list[tuple[str, int]]:
+    if sender is models.Task:
+        return [('project', instance.project_id), ('user', instance.owner_id)]
+    if sender is models.ProjectLike:
+        return [('project', instance.project_id), ('user', instance.user_id)]
+    return []
+
+
+def _in_cascade(sender, instance, using) -> bool:
+    blocks = connections[using].atomic_blocks
+    cascades = _cascades.get()
+    return any(
+        key in cascades and any(block is cascades[key] for block in blocks)
+        for key in _cascade_keys(sender, instance)
+    )
+
+
+def _delete_in_bulk(using, key: tuple[str, int], tasks, likes) -> None:
+    counters.track_deleted('Task', tasks)
+    counters.track_deleted('ProjectLike', likes)
+    search.remove_tasks(list(tasks.values_list('pk', flat=True)), using)
+    blocks = connections[using].atomic_blocks
+    cascades = {
+        other: block for other, block in _cascades.get().items()
+        if any(active is block for active in blocks)
+    }
+    cascades[key] = blocks[-1]
+    _cascades.set(cascades)
+
+
+@receiver(pre_delete, sender=models.Project)
+def delete_project_rows_in_bulk(sender, instance, using, **kwargs):
+    # the collector sends a signal per cascaded task and like, those are handled here in one go
+    _delete_in_bulk(
+        using, ('project', instance.pk),
+        models.Task.objects.using(using).filter(project=instance),
+        models.ProjectLike.objects.using(using).filter(project=instance),
+    )
+
+
+@receiver(pre_delete, sender=get_user_model())
+def delete_user_rows_in_bulk(sender, instance, using, **kwargs):
+    # rows in the user's own projects are left to delete_project_rows_in_bulk
+    tasks = models.Task.objects.using(using).filter(owner=instance).exclude(project__owner=instance)
+    likes = models.ProjectLike.objects.using(using).filter(user=instance).exclude(project__owner=instance)
+    generations.bump(*tasks.values_list('project_id', flat=True), *likes.values_list('project_id', flat=True))
+    _delete_in_bulk(using, ('user', instance.pk), tasks, likes)
+
+
+@receiver(post_delete, sender=models.Task)
+@receiver(post_delete, sender=models.Project)
+@receiver(post_delete, sender=models.ProjectLike)
+def update_counters_on_delete(sender, instance, using, **kwargs):
+    if _in_cascade(sender, instance, using):
+        return
+    counters.track(sender.__name__, instance.get_tracked_state(), None)
+    if sender is models.Project:
+        models.Counter.objects.filter(scope=counters.PROJECT, object_id=instance.pk).delete()
+        counters.invalidate((counters.PROJECT, instance.pk))
+
+
+@receiver(models.post_update, sender=models.Task)
+@receiver(models.post_update, sender=models.Project)
+@receiver(models.post_update, sender=models.ProjectLike)
+def update_counters_on_bulk_update(sender, previous, using, **kwargs):
+    previous_states = {row[0]: row[1:] for row in previous}
+    pks = list(previous_states)
+    states = []
+    for start in range(0, len(pks), 500):
+        current = sender.objects.using(using).filter(pk__in=pks[start:start + 500]).values_list(
+            'pk', *sender.tracked_fields
+        )
+        states.extend((previous_states[row[0]], row[1:]) for row in current)
+    counters.track_many(sender.__name__, states)
+
+
+@receiver(post_save, sender=models.Task)
+def index_task(sender, instance, using, **kwargs):
+    search.index_tasks([(instance.pk, instance.name, instance.description)], using)
+
+
+@receiver(post_delete, sender=models.Task)
+def unindex_task(sender, instance, using, **kwargs):
+    if not _in_cascade(sender, instance, using):
+        search.remove_tasks([instance.pk], using)
+
+
+@receiver(post_migrate)
+def forget_fts_availability(sender, using, **kwargs):
+    search.forget_available(using)
+
+
+@receiver(models.post_update, sender=models.Task)
+def reindex_updated_tasks(sender, previous, fields, using, **kwargs):
+    if not fields & {'name', 'description'}:
+        return
+    pks = [row[0] for row in previous]
+    for start in range(0, len(pks), 500):
+        search.index_tasks(list(sender.objects.using(using).filter(
+            pk__in=pks[start:start + 500]
+        ).values_list('pk', 'name', 'description')), using)
+
+
+def _project_ids(sender, state: tuple | None, pk: int | None = None) -> list[int]:
+    if sender is models.Project:
+        return [pk]
+    if state is None:
+        return []
+    return [state[sender.tracked_fields.index('project_id')]]
+
+
+@receiver(post_save, sender=models.Task)
+@receiver(post_save, sender=models.Project)
+@receiver(post_save, sender=models.ProjectLike)
+@receiver(post_delete, sender=models.Task)
+@receiver(post_delete, sender=models.Project)
+@receiver(post_delete, sender=models.ProjectLike)
+def bump_project_generation(sender, instance, using, **kwargs):
+    if _in_cascade(sender, instance, using):
+        return
+    project_ids = _project_ids(sender, instance.get_tracked_state(), instance.pk)
+    project_ids += _project_ids(sender, getattr(instance, '_previous_state', None), instance.pk)
+    generations.bump(*project_ids)
+
+
+@receiver(models.post_update, sender=models.Task)
+@receiver(models.post_update, sender=models.Project)
+@receiver(models.post_update, sender=models.ProjectLike)
+def bump_updated_project_generations(sender, previous, fields, using, **kwargs):
+    project_ids = [project_id for row in previous for project_id in _project_ids(sender, row[1:], row[0])]
+    if 'project' in fields or 'project_id' in fields:
+        project_ids += sender.objects.using(using).filter(
+            pk__in=[row[0] for row in previous]
+        ).values_list('project_id', flat=True).distinct()
+    generations.bump(*project_ids)
+
+
+@receiver(post_delete, sender=models.RequestProfile)
+def delete_profile_dump(sender, instance, **kwargs):
+    instance.dump.delete(save=False)
@@ -0,0 +1,39 @@
+document.querySelectorAll('input[data-autocomplete]').forEach(function (input) {
+    var list = document.getElementById(input.getAttribute('list'));
+    var target = input.dataset.target ? input.form.elements[input.dataset.target] : input;
+    var timer = null;
+
+    input.addEventListener('input', function () {
+        clearTimeout(timer);
+        timer = setTimeout(function () {
+            if (!input.value) {
+                return;
+            }
+            fetch(input.dataset.autocomplete + '?q=' + encodeURIComponent(input.value))
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    list.innerHTML = '';
+                    data.results.forEach(function (result) {
+                        var option = document.createElement('option');
+                        option.value = result.text;
+                        option.dataset.id = result.id;
+                        list.appendChild(option);
+                    });
+                });
+        }, 200);
+    });
+
+    input.addEventListener('change', function () {
+        var chosen = Array.from(list.options).find(function (option) {
+            return option.value === input.value;
+        });
+        if (chosen) {
+            target.value = chosen.dataset.id;
+        } else if (!input.value) {
+            target.value = '';
+        } else {
+            return;
+        }
+        input.form.submit();
+    });
+});
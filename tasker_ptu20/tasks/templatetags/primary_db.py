@@ -0,0 +1,23 @@
+from django import template
+from tasker_ptu20.routers import primary
+
+register = template.Library()
+
+
+class PrimaryNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        with primary():
+            return self.nodelist.render(context)
+
+
+@register.tag
+def primary_db(parser, token):
+    """Renders the block from default even in ``read_replica`` views, for fragments cached
+    under a generation the replica may not have caught up with yet.
+    """
+    nodelist = parser.parse(('endprimary_db', ))
+    parser.delete_first_token()
+    return PrimaryNode(nodelist)
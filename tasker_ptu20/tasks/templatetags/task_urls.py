@@ -0,0 +1,25 @@
+from urllib.parse import quote
+from django import template
+from django.conf import settings
+from django.urls import get_script_prefix, get_urlconf, reverse
+
+register = template.Library()
+
+PLACEHOLDER = 9007199254740993
+_url_templates = {}
+
+
+def url_template(name: str) -> str:
+    key = (name, get_script_prefix(), get_urlconf(settings.ROOT_URLCONF))
+    if key not in _url_templates:
+        url = reverse(name, args=[PLACEHOLDER]).replace('{', '{{').replace('}', '}}')
+        _url_templates[key] = url.replace(str(PLACEHOLDER), '{}')
+    return _url_templates[key]
+
+
+@register.simple_tag
+def row_url(name: str, pk: int, next_url=None) -> str:
+    url = url_template(name).format(int(pk))
+    if next_url is not None:
+        url = f"{url}?next={quote(str(next_url), safe='/')}"
+    return url
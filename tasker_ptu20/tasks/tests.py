@@ -1,3 +1,946 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from io import StringIO
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection, connections
+from django.template import Context, Template
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from customer_support.models import Ticket
+from tasker_ptu20 import metrics
+from tasker_ptu20.cache import TieredCache, _lock_file, _lock_path, single_flight
+from tasker_ptu20.routers import PRIMARY_COOKIE
+from tasker_ptu20.profiling import QueryBudgetExceeded, QueryRecorder, explain, is_full_scan, normalize_sql
+from .templatetags.task_urls import row_url
+from . import models, dashboard, counters, generations, paginators, search
 
-# Create your tests here.
+
+class DashboardTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user('jonas', password='secret')
+        cls.other = User.objects.create_user('petras', password='secret')
+        project = models.Project.objects.create(name='alpha', owner=cls.user)
+        other_project = models.Project.objects.create(name='beta', owner=cls.other)
+        yesterday = timezone.now() - timedelta(days=1)
+        models.Task.objects.create(name='a', project=project, owner=cls.user, deadline=yesterday)
+        models.Task.objects.create(name='b', project=project, owner=cls.user, is_done=True)
+        models.Task.objects.create(name='c', project=other_project, owner=cls.other)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stats_query_count(self):
+        with self.assertNumQueries(3):
+            stats = dashboard.get_dashboard_stats(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(dashboard.get_dashboard_stats(self.user), stats)
+        self.assertEqual(stats['users'], 2)
+        self.assertEqual(stats['projects'], 2)
+        self.assertEqual(stats['tasks'], 3)
+        self.assertEqual(stats['undone_tasks'], 2)
+        self.assertEqual(stats['overdue_tasks'], 1)
+        self.assertEqual(stats['done_tasks'], 1)
+        self.assertEqual(stats['user_projects'], 1)
+        self.assertEqual(stats['user_tasks'], 2)
+        self.assertEqual(stats['user_undone_tasks'], 1)
+        self.assertEqual(stats['user_overdue_tasks'], 1)
+
+    def test_stats_invalidated_by_writes(self):
+        stats = dashboard.get_dashboard_stats(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Task.objects.filter(owner=self.user).update(is_done=True)
+        fresh = dashboard.get_dashboard_stats(self.user)
+        self.assertEqual(fresh['user_undone_tasks'], stats['user_undone_tasks'] - 1)
+        self.assertEqual(fresh['done_tasks'], stats['done_tasks'] + 1)
+
+    def test_index_anonymous(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['user_dashboard'])
+        self.assertEqual(len(response.context['common_dashboard']), 6)
+
+    def test_index_user(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('index'))
+        self.assertEqual(len(response.context['user_dashboard']), 4)
+        self.assertEqual(response.context['user_dashboard'][1][1], 2)
+
+
+class CounterTestCase(TestCase):
+    databases = {'default', 'support'}
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user('jonas', password='secret')
+        cls.other = User.objects.create_user('petras', password='secret')
+        cls.project = models.Project.objects.create(name='alpha', owner=cls.user)
+        cls.task = models.Task.objects.create(name='a', project=cls.project, owner=cls.user)
+        models.Task.objects.create(name='b', project=cls.project, owner=cls.other, is_done=True)
+
+    def assertCounter(self, scope, object_id, **expected):
+        counter = models.Counter.objects.get(scope=scope, object_id=object_id)
+        for field, value in expected.items():
+            self.assertEqual(getattr(counter, field), value, field)
+
+    def test_save_and_delete(self):
+        self.assertCounter('project', self.project.pk, tasks=2, undone=1, done=1)
+        self.assertCounter('user', self.user.pk, tasks=1, undone=1, projects=1)
+        task = models.Task.objects.get(pk=self.task.pk)
+        task.is_done = True
+        task.owner = self.other
+        task.save()
+        self.assertCounter('global', 0, tasks=2, undone=0, done=2, projects=1)
+        self.assertCounter('user', self.user.pk, tasks=0, undone=0)
+        self.assertCounter('user', self.other.pk, tasks=2, done=2)
+        task.delete()
+        self.assertCounter('project', self.project.pk, tasks=1, done=1)
+
+    def test_queryset_update(self):
+        models.Task.objects.filter(is_done=False).update(is_done=True)
+        self.assertCounter('project', self.project.pk, tasks=2, undone=0, done=2)
+        self.assertCounter('global', 0, undone=0, done=2)
+
+    def test_likes_and_project_delete(self):
+        models.ProjectLike.objects.create(project=self.project, user=self.other)
+        self.assertCounter('project', self.project.pk, likes=1)
+        self.assertCounter('user', self.other.pk, likes=1)
+        self.project.delete()
+        self.assertFalse(models.Counter.objects.filter(scope='project', object_id=self.project.pk).exists())
+        self.assertCounter('global', 0, tasks=0, projects=0, likes=0)
+
+    def test_cascades_counted_in_bulk(self):
+        stranger = get_user_model().objects.create_user('ona', password='secret')
+        elsewhere = models.Project.objects.create(name='beta', owner=stranger)
+        models.Task.objects.create(name='c', project=elsewhere, owner=self.user)
+        models.ProjectLike.objects.create(project=elsewhere, user=self.user)
+        for number in range(20):
+            models.Task.objects.create(name=f'bulk {number}', project=self.project, owner=self.other)
+        with CaptureQueriesContext(connection) as queries:
+            self.project.delete()
+        self.assertLess(len(queries), 30)
+        self.assertCounter('global', 0, tasks=1, projects=1, likes=1)
+        self.assertCounter('user', self.other.pk, tasks=0, done=0)
+        self.user.delete()
+        self.assertCounter('global', 0, tasks=0, undone=0, projects=1, likes=0)
+        self.assertCounter('project', elsewhere.pk, tasks=0, likes=0)
+        self.assertEqual(counters.rebuild_all(), 0)
+
+    def test_rebuild_repairs_drift(self):
+        models.Counter.objects.filter(scope='global').update(tasks=42)
+        self.assertEqual(counters.rebuild_all(), 1)
+        self.assertCounter('global', 0, tasks=2)
+        self.assertEqual(models.Project.objects.with_task_stats(recent_tasks=0).get().total_tasks, 2)
+
+
+class KeysetPaginatorTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user('jonas', password='secret')
+        project = models.Project.objects.create(name='alpha', owner=user)
+        for number in range(12):
+            models.Task.objects.create(name=f'task {number}', project=project, owner=user, is_done=number % 3 == 0)
+
+    def test_walk_forward_and_back(self):
+        expected = list(models.Task.objects.order_by('is_done', '-created_at', 'pk'))
+        paginator = paginators.KeysetPaginator(models.Task.objects.all(), 5)
+        pages = [paginator.get_page(None)]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        self.assertEqual([task for page in pages for task in page], expected)
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        previous = paginator.get_page(pages[-1].previous_cursor)
+        self.assertEqual(list(previous), list(pages[1]))
+        self.assertTrue(previous.has_previous())
+        self.assertFalse(paginator.get_page(previous.previous_cursor).has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = paginators.KeysetPaginator(models.Task.objects.all(), 5)
+        self.assertEqual(list(paginator.get_page('garbage')), list(paginator.get_page(None)))
+
+    @override_settings(KEYSET_PAGINATION=True)
+    def test_views_skip_count(self):
+        for name in ('task_list', 'project_list'):
+            with self.subTest(name):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+
+
+class TaskSearchTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('jonas', password='secret')
+        cls.project = models.Project.objects.create(name='alpha', owner=cls.user)
+        cls.other_project = models.Project.objects.create(name='beta', owner=cls.user)
+        cls.milk = models.Task.objects.create(name='buy milk', project=cls.project, owner=cls.user)
+        cls.bread = models.Task.objects.create(
+            name='bakery', description='<p>fresh <b>bread</b> &amp; milk</p>',
+            project=cls.other_project, owner=cls.user,
+        )
+
+    def test_search_ranks_name_and_description(self):
+        self.assertTrue(search.fts_available())
+        self.assertEqual(list(models.Task.objects.search('milk')), [self.milk, self.bread])
+        self.assertEqual(list(models.Task.objects.search('brea')), [self.bread])
+        self.assertEqual(list(models.Task.objects.filter(project=self.project).search('milk')), [self.milk])
+
+    def test_missing_index_is_remembered(self):
+        search.drop_index(connection)
+        self.assertFalse(search.fts_available())
+        with self.assertNumQueries(0):
+            self.assertFalse(search.fts_available())
+        self.assertEqual(list(models.Task.objects.search('milk')), [self.milk])
+        self.assertTrue(search.create_index(connection))
+        self.assertTrue(search.fts_available())
+
+    def test_index_follows_changes(self):
+        models.Task.objects.filter(pk=self.milk.pk).update(name='buy cheese')
+        self.assertEqual(list(models.Task.objects.search('cheese')), [self.milk])
+        self.bread.delete()
+        self.assertEqual(list(models.Task.objects.search('milk')), [])
+
+    def test_task_list_search(self):
+        response = self.client.get(reverse('task_list'), {'search_name': 'milk', 'project': self.other_project.pk})
+        self.assertEqual(list(response.context['task_list']), [self.bread])
+        with override_settings(KEYSET_PAGINATION=True):
+            response = self.client.get(reverse('task_list'), {'search_name': 'milk'})
+        self.assertEqual(list(response.context['task_list']), [self.milk, self.bread])
+
+
+class TieredCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_local_then_shared(self):
+        cache.set('things:one', {'a': 1})
+        cache._local.clear()
+        self.assertEqual(cache.get('things:one'), {'a': 1})
+        self.assertEqual(cache.get('things:one'), {'a': 1})
+        self.assertIsNone(cache.get('things:two'))
+        stats = cache.stats()
+        self.assertGreaterEqual(stats['shared_hits'], 1)
+        self.assertGreaterEqual(stats['local_hits'], 1)
+        self.assertGreaterEqual(stats['misses'], 1)
+
+    def test_delete_prefix(self):
+        cache.set('things:one', 1)
+        cache.set('other:one', 2)
+        cache.delete_prefix('things')
+        self.assertIsNone(cache.get('things:one'))
+        self.assertEqual(cache.get('other:one'), 2)
+        self.assertEqual(caches['shared'].get('namespace-version:things'), 1)
+        with self.assertRaises(ValueError):
+            cache.delete_prefix('things:one')
+
+    def test_other_workers_see_versions_and_generations(self):
+        other = TieredCache(None, settings.CACHES['default'])
+        cache.set('things:one', 1)
+        generation = generations.get(1)
+        self.assertEqual(cache.get('things:one'), 1)
+        other.delete_prefix('things')
+        other.set('generation:project:1', generation + 1)
+        self.assertIsNone(cache.get('things:one'))
+        self.assertEqual(generations.get(1), generation + 1)
+
+    def test_shared_tier_is_not_project_cache(self):
+        self.assertNotEqual(Path(caches['shared']._dir), settings.BASE_DIR / 'cache')
+
+    def test_lru_is_bounded(self):
+        for number in range(cache._max_entries + 10):
+            cache.set(f'things:{number}', number)
+        self.assertLessEqual(len(cache._local), cache._max_entries)
+        self.assertEqual(cache.get('things:0'), 0)
+
+
+class AutocompleteTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user('jonas', first_name='Jonas', last_name='Jonaitis')
+        User.objects.create_user('petras', first_name='Petras', last_name='Jonaitis')
+        User.objects.create_user('ona')
+        for number in range(15):
+            models.Project.objects.create(name=f'project {number}', owner=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_users_prefix_match(self):
+        response = self.client.get(reverse('autocomplete_users'), {'q': 'jon'})
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertEqual([result['id'] for result in response.json()['results']], ['jonas', 'petras'])
+        self.assertEqual(response.json()['results'][0]['text'], 'Jonas Jonaitis (jonas)')
+
+    def test_projects_limit(self):
+        response = self.client.get(reverse('autocomplete_projects'), {'q': 'proj'})
+        self.assertEqual(len(response.json()['results']), 10)
+        response = self.client.get(reverse('autocomplete_projects'), {'q': ''})
+        self.assertEqual(response.json()['results'], [])
+
+    def test_list_pages_do_not_load_users(self):
+        for name in ('task_list', 'project_list'):
+            with self.subTest(name):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(reverse(name))
+                self.assertFalse([query for query in queries if 'auth_user' in query['sql']])
+
+
+class ProjectTaskStatsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('jonas', password='secret')
+        for number in range(4):
+            project = models.Project.objects.create(name=f'project {number}', owner=cls.user)
+            for task_number in range(number + 1):
+                models.Task.objects.create(
+                    name=f'task {number}.{task_number}', project=project, owner=cls.user,
+                    is_done=task_number % 2 == 1,
+                )
+
+    def test_with_task_stats(self):
+        with self.assertNumQueries(2):
+            projects = list(models.Project.objects.with_task_stats())
+            self.assertEqual([project.total_tasks for project in projects], [1, 2, 3, 4])
+            self.assertEqual([project.undone_tasks for project in projects], [1, 1, 2, 2])
+            self.assertEqual(
+                [task.name for task in projects[3].recent_task_list],
+                ['task 3.3', 'task 3.2', 'task 3.1'],
+            )
+
+    def test_admin_changelist_sorted_by_stats(self):
+        self.client.force_login(self.user)
+        url = reverse('admin:tasks_project_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'o': '-2'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [project.name for project in response.context['cl'].result_list],
+            ['project 3', 'project 2', 'project 1', 'project 0'],
+        )
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql'] and '"tasks_task"' in query['sql']])
+
+
+class ToggleTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user('jonas', password='secret')
+        cls.other = User.objects.create_user('petras', password='secret')
+        cls.project = models.Project.objects.create(name='alpha', owner=cls.user)
+        cls.task = models.Task.objects.create(name='a', project=cls.project, owner=cls.other)
+
+    def test_task_done_by_project_owner(self):
+        self.client.force_login(self.user)
+        url = reverse('task_done', args=[self.task.pk])
+        response = self.client.get(url, {'format': 'json'})
+        self.assertEqual(response.json()['is_done'], True)
+        response = self.client.get(url, {'format': 'json'})
+        self.assertEqual(response.json()['is_done'], False)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertRedirects(self.client.get(url), reverse('task_list'))
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.is_done)
+        self.assertEqual(counters.get('project', self.project.pk).done, 1)
+
+    def test_task_done_permissions(self):
+        stranger = get_user_model().objects.create_user('ona', password='secret')
+        self.client.force_login(stranger)
+        response = self.client.get(reverse('task_done', args=[self.task.pk]), {'format': 'json'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get(reverse('task_done', args=[0])).status_code, 404)
+        self.client.logout()
+        self.client.get(reverse('task_done', args=[self.task.pk]))
+        self.task.refresh_from_db()
+        self.assertFalse(self.task.is_done)
+
+    def test_project_like_toggle(self):
+        self.client.force_login(self.other)
+        url = reverse('project_like', args=[self.project.pk])
+        self.assertTrue(self.client.get(url, {'like_type': 2, 'format': 'json'}).json()['liked'])
+        self.assertTrue(self.client.get(url, {'like_type': 1, 'format': 'json'}).json()['liked'])
+        self.assertFalse(self.client.get(url, {'like_type': 2, 'format': 'json'}).json()['liked'])
+        self.assertEqual(list(self.project.likes.values_list('like_type', flat=True)), [1])
+        self.assertEqual(counters.get('project', self.project.pk).likes, 1)
+
+    def test_project_like_rejects_unknown_types(self):
+        self.client.force_login(self.other)
+        url = reverse('project_like', args=[self.project.pk])
+        for like_type in ('6', '-1', 'x', str(2 ** 70)):
+            with self.subTest(like_type):
+                self.assertEqual(self.client.get(url, {'like_type': like_type}).status_code, 400)
+        self.assertFalse(self.project.likes.exists())
+        self.assertEqual(self.client.get(url, {'like_type': '', 'format': 'json'}).json()['like_type'], 3)
+
+
+class ProjectGenerationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('jonas', password='secret')
+        cls.project = models.Project.objects.create(name='alpha', owner=cls.user)
+        cls.other_project = models.Project.objects.create(name='beta', owner=cls.user)
+        cls.task = models.Task.objects.create(name='a', project=cls.project, owner=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertBumped(self, project, action):
+        before = generations.get(project.pk)
+        action()
+        self.assertNotEqual(generations.get(project.pk), before)
+
+    def test_changes_bump_generation(self):
+        self.assertEqual(generations.get(self.project.pk), generations.get(self.project.pk))
+        self.assertBumped(self.project, lambda: models.Task.objects.create(name='b', project=self.project, owner=self.user))
+        self.assertBumped(self.project, lambda: models.ProjectLike.objects.create(project=self.project, user=self.user))
+        self.assertBumped(self.project, lambda: models.Project.objects.filter(pk=self.project.pk).update(name='gamma'))
+        self.assertBumped(self.other_project, lambda: models.Task.objects.filter(pk=self.task.pk).update(project=self.other_project))
+        self.assertBumped(self.other_project, lambda: models.Task.objects.get(pk=self.task.pk).delete())
+
+    def test_project_detail_fragments_cached(self):
+        url = reverse('project_detail', args=[self.project.pk])
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(url)
+        self.assertLess(len(second), len(first))
+        self.assertContains(response, '>a</a>')
+        models.Task.objects.create(name='fresh', project=self.project, owner=self.user)
+        self.assertContains(self.client.get(url), '>fresh</a>')
+
+
+class AnonymousPageCacheTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('jonas', password='secret')
+        cls.project = models.Project.objects.create(name='alpha', owner=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_pages_cached_without_csrf(self):
+        for url in (reverse('index'), reverse('project_list'), reverse('project_detail', args=[self.project.pk])):
+            with self.subTest(url):
+                response = self.client.get(url)
+                self.assertNotIn('csrftoken', response.cookies)
+                self.assertNotContains(response, 'csrfmiddlewaretoken')
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.client.get(url).content, response.content)
+
+    def test_cache_keyed_by_language_and_generation(self):
+        url = reverse('project_detail', args=[self.project.pk])
+        english = self.client.get(url).content
+        response = self.client.get(reverse('switch_language'), {'language': 'lt', 'next': url})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertNotEqual(self.client.get(url).content, english)
+        models.Task.objects.create(name='fresh', project=self.project, owner=self.user)
+        self.assertContains(self.client.get(url), 'fresh')
+
+    def test_counter_changes_keep_other_detail_pages(self):
+        other = models.Project.objects.create(name='beta', owner=self.user)
+        task = models.Task.objects.create(name='b', project=other, owner=self.user)
+        detail, index = reverse('project_detail', args=[self.project.pk]), reverse('index')
+        self.client.get(detail)
+        self.client.get(index)
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Task.objects.filter(pk=task.pk).update(is_done=True)
+        with self.assertNumQueries(0):
+            self.client.get(detail)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(index)
+        self.assertTrue(queries)
+
+    def test_switch_language_rejects_foreign_next(self):
+        response = self.client.get(reverse('switch_language'), {'language': 'it', 'next': 'https://example.com/'})
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+        self.assertEqual(response.cookies['django_language'].value, 'it')
+
+    def test_authenticated_pages_not_cached(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('index'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('index'))
+        self.assertTrue(queries)
+
+
+class SingleFlightTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight('flight:test', compute, 60)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+
+    def run_while_computing(self, key, run, should_store=None):
+        started, release = threading.Event(), threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(5)
+            return 'slow'
+
+        thread = threading.Thread(target=lambda: single_flight(key, compute, 60, should_store=should_store))
+        thread.start()
+        started.wait(5)
+        try:
+            return run(release)
+        finally:
+            release.set()
+            thread.join()
+
+    def test_unrelated_keys_do_not_wait(self):
+        def run(release):
+            began = time.monotonic()
+            self.assertEqual(single_flight('flight:other', lambda: 'fast', 60, lock_timeout=5), 'fast')
+            return time.monotonic() - began
+        self.assertLess(self.run_while_computing('flight:test', run), 1)
+
+    def test_waiters_compute_when_nothing_stored(self):
+        def run(release):
+            results = []
+            waiter = threading.Thread(target=lambda: results.append(
+                single_flight('flight:test', lambda: 'own', 60, lock_timeout=5, should_store=bool)
+            ))
+            began = time.monotonic()
+            waiter.start()
+            time.sleep(0.1)
+            release.set()
+            waiter.join()
+            self.assertEqual(results, ['own'])
+            return time.monotonic() - began
+        self.assertLess(self.run_while_computing('flight:test', run, should_store=lambda value: False), 1)
+
+    def test_other_process_lock_file(self):
+        self.assertTrue(_lock_file('flight:test', 10))
+        self.assertFalse(_lock_file('flight:test', 10))
+        os.utime(_lock_path('flight:test'), (time.time() - 60, time.time() - 60))
+        self.assertTrue(_lock_file('flight:test', 10))
+        threading.Timer(0.2, _lock_path('flight:test').unlink).start()
+        began = time.monotonic()
+        self.assertEqual(single_flight('flight:test', lambda: 'mine', 60, lock_timeout=5), 'mine')
+        self.assertLess(time.monotonic() - began, 1)
+
+    def test_expired_value_served_while_refreshing(self):
+        single_flight('flight:test', lambda: 'old', 60)
+        cache.set('flight:test', ('old', 0, time.time() - 1), 60)
+        self.assertTrue(_lock_file('flight:test', 10))
+        self.addCleanup(_lock_path('flight:test').unlink, missing_ok=True)
+        self.assertEqual(single_flight('flight:test', lambda: 'new', 60), 'old')
+        self.assertFalse(_lock_file('flight:test', 10))
+        _lock_path('flight:test').unlink()
+        self.assertEqual(single_flight('flight:test', lambda: 'new', 60), 'new')
+        self.assertEqual(single_flight('flight:test', lambda: 'newer', 60), 'new')
+
+    def test_project_list_count_cached(self):
+        user = get_user_model().objects.create_user('jonas', password='secret')
+        self.client.force_login(user)
+        models.Project.objects.create(name='alpha', owner=user)
+        self.client.get(reverse('project_list'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('project_list'))
+        self.assertFalse([query for query in queries if '"__count"' in query['sql']])
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Project.objects.create(name='beta', owner=user)
+        self.assertEqual(self.client.get(reverse('project_list')).context['paginator'].count, 2)
+
+
+class TaskRowTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('jonas', password='secret')
+        cls.project = models.Project.objects.create(name='alpha', owner=cls.user)
+        cls.task = models.Task.objects.create(name='first', project=cls.project, owner=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_row_url_matches_reverse(self):
+        for name in ('task_done', 'task_detail'):
+            with self.subTest(name):
+                self.assertEqual(row_url(name, self.task.pk), reverse(name, args=[self.task.pk]))
+                self.assertEqual(
+                    row_url(name, self.task.pk, '/tasks/?owner=jonas & co'),
+                    reverse(name, args=[self.task.pk]) + '?next=/tasks/%3Fowner%3Djonas%20%26%20co',
+                )
+
+    def test_row_fragment_follows_updated_at(self):
+        self.client.force_login(self.user)
+        url = reverse('task_list')
+        self.assertContains(self.client.get(url), '&#x2610;')
+        self.client.get(reverse('task_done', args=[self.task.pk]))
+        self.assertContains(self.client.get(url), '&#x2611;')
+        models.Task.objects.filter(pk=self.task.pk).update(name='renamed')
+        self.assertContains(self.client.get(url), 'renamed')
+
+
+@override_settings(QUERY_PROFILING=True)
+class QueryProfilerTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('jonas', password='secret')
+        for number in range(3):
+            models.Project.objects.create(name=f'project {number}', owner=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (%s, %s,%s) AND name = 'x''y' LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+
+    def test_repeated_queries_from_template_line(self):
+        template = Template("{% for project in projects %}\n{{ project.owner.username }}{% endfor %}")
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            template.render(Context({'projects': models.Project.objects.all()}))
+        self.assertEqual(len(recorder.queries), 4)
+        [(line, sql)] = recorder.n_plus_one(3)
+        self.assertTrue(line.endswith(':2'))
+        self.assertIn('auth_user', sql)
+
+    def test_report_headers(self):
+        response = self.client.get(reverse('task_list'))
+        self.assertEqual(response['X-Query-N-Plus-One'], '')
+        self.assertGreater(int(response['X-Query-Count']), 0)
+
+    @override_settings(DEBUG=True, QUERY_BUDGETS={'task_list': 1})
+    def test_budget_fails_request_in_debug(self):
+        with self.assertLogs('tasker_ptu20.profiling', 'INFO'), self.assertLogs('django.request'), \
+                self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('task_list'))
+
+
+class SeedTaskerTestCase(TestCase):
+    databases = {'default', 'support'}
+
+    def test_seed_creates_consistent_data(self):
+        call_command(
+            'seed_tasker', users=4, projects=5, tasks=50, likes=6, tickets=3, messages=2, batch_size=7,
+            stdout=StringIO(),
+        )
+        users = get_user_model().objects.filter(username__startswith='seed')
+        self.assertEqual(users.count(), 4)
+        self.assertEqual(users.filter(profile__isnull=False).count(), 4)
+        self.assertEqual(models.Task.objects.count(), 50)
+        self.assertEqual(models.ProjectLike.objects.count(), 6)
+        self.assertEqual(Ticket.objects.using('support').count(), 3)
+        self.assertEqual(counters.rebuild_all(), 0)
+        self.assertEqual(counters.get(counters.GLOBAL).tasks, 50)
+        self.assertTrue(models.Task.objects.search(models.Task.objects.first().name.split()[0]).exists())
+
+
+class BenchmarkViewsTestCase(TestCase):
+    databases = {'default', 'support'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('jonas', password='secret')
+        project = models.Project.objects.create(name='alpha', owner=cls.user)
+        for number in range(60):
+            models.Task.objects.create(name=f'task {number}', project=project, owner=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_report(self):
+        output = StringIO()
+        call_command(
+            'benchmark_views', processes=0, iterations=3, warmup=0, host='testserver',
+            views=['index', 'task_list', 'project_detail', 'task_done'], stdout=output, stderr=StringIO(),
+        )
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['user'], 'jonas')
+        self.assertEqual(set(report['views']), {'index', 'task_list', 'project_detail'})
+        result = report['views']['task_list']
+        self.assertEqual(result['statuses'], {'200': 3})
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertGreater(result['queries_max'], 0)
+
+    def test_task_list_page_range_is_elided(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('task_list'))
+        self.assertEqual(response.context['page_range'], [1, 2, 3, 4, '…', 11, 12])
+
+
+class MetricsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('jonas', password='secret')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(METRICS_ENABLED=True, METRICS_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        metrics.registry.reset()
+
+    def test_histograms_per_view(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('task_list'))
+        self.client.get(reverse('task_list'))
+        self.client.get(reverse('index'))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE tasker_request_duration_seconds histogram', body)
+        self.assertIn('tasker_request_duration_seconds_count{view="task_list"} 2', body)
+        self.assertIn('tasker_queries_bucket{view="task_list",le="+Inf"} 2', body)
+        self.assertIn('# TYPE tasker_cache_hits_total counter', body)
+        self.assertRegex(body, r'tasker_cache_hits_total\{tier="local"\} [1-9]')
+        template_count = [line for line in body.splitlines() if line.startswith('tasker_template_duration_seconds_sum{view="task_list"}')]
+        self.assertGreater(float(template_count[0].split()[-1]), 0)
+
+    def test_workers_merged_from_files(self):
+        other = metrics.Registry()
+        other.observe('index', {'request_duration_seconds': 0.02, 'queries': 3})
+        other.pid = 1
+        other.flush(force=True)
+        metrics.registry.observe('index', {'request_duration_seconds': 0.2, 'queries': 3})
+        metrics.registry.flush(force=True)
+        views = metrics.collect()
+        self.assertEqual(views['index']['request_duration_seconds']['count'], 2)
+        self.assertEqual(views['index']['queries']['count'], 2)
+
+    def test_not_public(self):
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1').status_code, 404)
+        proxied = {'REMOTE_ADDR': '127.0.0.1', 'HTTP_X_FORWARDED_FOR': '203.0.113.7'}
+        self.assertEqual(self.client.get(reverse('metrics'), **proxied).status_code, 404)
+        with override_settings(METRICS_TOKEN='secret-token'):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret-token', **proxied)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code, 200)
+
+    def test_dead_worker_files_pruned(self):
+        process = subprocess.Popen(['true'])
+        process.wait()
+        dead = metrics.Registry()
+        dead.observe('index', {'queries': 1})
+        dead.pid = process.pid
+        dead.flush(force=True)
+        path = Path(settings.METRICS_DIR, f"{process.pid}.json")
+        self.assertTrue(path.exists())
+        self.assertNotIn('index', metrics.collect())
+        self.assertFalse(path.exists())
+
+
+class RequestProfileTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'secret')
+        cls.user = get_user_model().objects.create_user('jonas', password='secret')
+        cls.project = models.Project.objects.create(name='alpha', owner=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(REQUEST_PROFILING=True, PROFILE_DIR=directory.name, PROFILE_MAX_DUMPS=2)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_only_staff_can_profile(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('project_detail', args=[self.project.pk]), HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(models.RequestProfile.objects.exists())
+
+    def test_dumps_are_bounded_and_browsable(self):
+        self.client.force_login(self.staff)
+        url = reverse('project_detail', args=[self.project.pk])
+        self.assertNotIn('X-Profile-Id', self.client.get(url, {'profile': 1}))
+        responses = [self.client.get(url, HTTP_X_PROFILE='1') for _ in range(3)]
+        self.assertEqual(models.RequestProfile.objects.count(), 2)
+        self.assertFalse(models.RequestProfile.objects.filter(pk=responses[0]['X-Profile-Id']).exists())
+        profile = models.RequestProfile.objects.get(pk=responses[-1]['X-Profile-Id'])
+        self.assertEqual(profile.view_name, 'project_detail')
+        response = self.client.get(reverse('admin:tasks_requestprofile_change', args=[profile.pk]))
+        self.assertContains(response, 'cumulative')
+        response = self.client.get(reverse('admin:tasks_requestprofile_download', args=[profile.pk]))
+        self.assertEqual(response['Content-Disposition'].split(';')[0], 'attachment')
+        path = profile.dump.path
+        self.assertTrue(path.startswith(tempfile.gettempdir()))
+        profile.delete()
+        self.assertFalse(os.path.exists(path))
+
+
+@override_settings(SLOW_QUERY_LOG=True, SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_MAX_ROWS=5)
+class SlowQueryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'secret')
+        project = models.Project.objects.create(name='alpha', owner=cls.staff)
+        models.Task.objects.create(name='first', project=project, owner=cls.staff)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+
+    def test_admin_search_full_scan_recorded(self):
+        self.client.get(reverse('admin:tasks_task_changelist'), {'q': 'first'})
+        self.assertEqual(models.SlowQuery.objects.count(), 5)
+        scans = models.SlowQuery.objects.filter(source='admin:tasks_task_changelist', full_scan=True)
+        self.assertTrue(scans.filter(sql__contains='LIKE').exists())
+        self.assertIn('SCAN tasks_task', scans.filter(sql__contains='LIKE').first().plan)
+        response = self.client.get(reverse('admin:tasks_slowquery_changelist'), {'full_scan__exact': 1})
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_action_named_in_source(self):
+        task = models.Task.objects.get()
+        self.client.post(reverse('admin:tasks_task_changelist'), {
+            'action': 'delete_selected', '_selected_action': [task.pk],
+        })
+        self.assertTrue(models.SlowQuery.objects.filter(source='admin:tasks_task_changelist action=delete_selected').exists())
+
+
+class DatabaseProfileTestCase(TestCase):
+    def test_pragmas_and_transaction_mode(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class BenchmarkDatabaseTestCase(TransactionTestCase):
+    def test_report(self):
+        user = get_user_model().objects.create_user('jonas', password='secret')
+        project = models.Project.objects.create(name='alpha', owner=user)
+        models.Task.objects.create(name='first', project=project, owner=user)
+        output = StringIO()
+        call_command('benchmark_database', processes=1, duration=0.2, stdout=output, stderr=StringIO())
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['production']['errors'], 0)
+        self.assertGreater(report['production']['reads'], 0)
+
+
+@override_settings(READ_REPLICA=True)
+class ReplicaRouterTestCase(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('jonas', password='secret')
+        self.project = models.Project.objects.create(name='alpha', owner=self.user)
+        self.task = models.Task.objects.create(name='first', project=self.project, owner=self.user)
+        self.client.force_login(self.user)
+
+    def replica_queries(self, url):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            self.client.get(url)
+        return [query['sql'] for query in queries]
+
+    def test_read_views_use_replica(self):
+        for url in (reverse('task_list'), reverse('project_list'), reverse('project_detail', args=[self.project.pk])):
+            with self.subTest(url):
+                queries = self.replica_queries(url)
+                self.assertTrue(queries)
+                self.assertFalse([sql for sql in queries if 'django_session' in sql])
+        self.assertFalse(self.replica_queries(reverse('task_detail', args=[self.task.pk])))
+
+    def test_cached_project_page_shows_new_task(self):
+        url = reverse('project_detail', args=[self.project.pk])
+        anonymous = Client()
+        for client in (anonymous, self.client):
+            client.get(url)
+        models.Task.objects.create(name='second', project=self.project, owner=self.user)
+        for client, tables in ((anonymous, ('',)), (self.client, ('tasks_task', 'tasks_projectlike'))):
+            with self.subTest(authenticated=client is self.client):
+                with CaptureQueriesContext(connections['replica']) as queries:
+                    response = client.get(url)
+                self.assertContains(response, 'second')
+                self.assertFalse([query['sql'] for query in queries if any(table in query['sql'] for table in tables)])
+
+    def test_cached_counts_come_from_primary(self):
+        for url, fragments in (
+            (reverse('index'), ('tasks_counter', 'COUNT(')),
+            (reverse('project_list'), ('SELECT COUNT(*)', )),
+        ):
+            with self.subTest(url):
+                queries = self.replica_queries(url)
+                self.assertTrue(queries)
+                self.assertFalse([sql for sql in queries if any(fragment in sql for fragment in fragments)])
+        self.assertEqual(cache.get(counters.cache_key(counters.USER, self.user.pk)).tasks, 1)
+
+    def test_reads_stay_on_primary_after_write(self):
+        response = self.client.get(reverse('task_done', args=[self.task.pk]))
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        self.assertFalse(self.replica_queries(reverse('task_list')))
+        self.client.cookies[PRIMARY_COOKIE] = '0'
+        self.assertTrue(self.replica_queries(reverse('task_list')))
+
+
+class QueryIndexTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('jonas', password='secret')
+        cls.project = models.Project.objects.create(name='alpha', owner=cls.user)
+        models.Task.objects.create(
+            name='first', project=cls.project, owner=cls.user, deadline=timezone.now() - timedelta(days=1),
+        )
+
+    def test_no_index_covered_by_composite(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, models.Task._meta.db_table)
+        columns = [constraint['columns'] for constraint in constraints.values() if constraint['index']]
+        for column in ('is_done', 'deadline', 'owner_id', 'project_id'):
+            with self.subTest(column):
+                self.assertNotIn([column], columns)
+
+    def plan(self, evaluate) -> str:
+        with CaptureQueriesContext(connection) as queries:
+            evaluate()
+        return explain(connection, queries[-1]['sql'], None)
+
+    def test_hot_queries_use_indexes(self):
+        tasks = models.Task.objects
+        hot_queries = {
+            'task_open_deadline_idx (deadline<?)': lambda: dashboard.get_dashboard_stats(self.user),
+            'task_done_created_idx': lambda: list(tasks.all()[:5]),
+            'task_owner_done_created_idx (owner_id=?)': lambda: list(tasks.filter(is_done=False, owner=self.user)[:5]),
+            'task_project_done_created_idx (project_id=?)': lambda: list(tasks.filter(project=self.project)[5:10]),
+            '(project_id=? AND user_id=? AND like_type=?)': lambda: models.ProjectLike.objects.filter(
+                project=self.project, user=self.user, like_type=3,
+            ).exists(),
+        }
+        for expected, evaluate in hot_queries.items():
+            with self.subTest(expected):
+                cache.clear()
+                plan = self.plan(evaluate)
+                self.assertIn(expected, plan)
+                self.assertFalse(is_full_scan(plan))
+                self.assertNotIn('TEMP B-TREE', plan)
@@ -15,4 +15,7 @@ urlpatterns = [
     path('task/<int:pk>/edit/', views.task_update, name='task_update'),
     path('task/<int:pk>/delete/', views.task_delete, name='task_delete'),
     path('task/<int:pk>/done/', views.task_done, name='task_done'),
+    path('language/', views.switch_language, name='switch_language'),
+    path('autocomplete/users/', views.autocomplete_users, name='autocomplete_users'),
+    path('autocomplete/projects/', views.autocomplete_projects, name='autocomplete_projects'),
 ]
@@ -1,41 +1,80 @@
+import hashlib
 from typing import Any
-from datetime import datetime
+from django.conf import settings
 from django.core.paginator import Paginator
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Q, Value, When
 from django.db.models.query import QuerySet
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
-from django.utils.translation import gettext_lazy as _
+from django.utils.decorators import method_decorator
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils.translation import check_for_language, gettext_lazy as _
 from django.views import generic
+from django.views.decorators.cache import cache_control
 from urllib import parse
-from . import models, forms
+from tasker_ptu20.cache import single_flight
+from tasker_ptu20.routers import read_replica
+from . import models, forms, counters, dashboard, generations, pagecache, paginators
 
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_TIMEOUT = 60
+PROJECT_COUNT_TIMEOUT = 60
 
+
+@method_decorator(read_replica, name='dispatch')
+@method_decorator(pagecache.cache_anonymous_page(), name='dispatch')
 class ProjectListView(generic.ListView):
     model = models.Project
     template_name = 'tasks/project_list.html'
     paginate_by = 5
 
+    def paginate_queryset(self, queryset, page_size):
+        if not settings.KEYSET_PAGINATION:
+            return super().paginate_queryset(queryset, page_size)
+        page = paginators.KeysetPaginator(queryset, page_size).get_page(self.request.GET.get('cursor'))
+        return page.paginator, page, page.object_list, page.has_other_pages()
+
+    def get_paginator(self, queryset, per_page, **kwargs) -> Paginator:
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        owner = hashlib.md5(self.request.GET.get('owner', '').encode()).hexdigest()
+        paginator.count = single_flight(
+            f"projects:count:{owner}", queryset.using(counters.PRIMARY).count, PROJECT_COUNT_TIMEOUT,
+        )
+        return paginator
+
     def get_queryset(self) -> QuerySet[Any]:
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().with_task_stats(recent_tasks=0)
         if self.request.GET.get('owner'):
             queryset = queryset.filter(owner__username=self.request.GET.get('owner'))
         return queryset
     
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        context['user_list'] = get_user_model().objects.all()
         gets = self.request.GET.copy()
-        if "page" in gets:
-            gets.pop("page")
+        for key in ("page", "cursor"):
+            if key in gets:
+                gets.pop(key)
         context['filters'] = "&".join([f"{key}={parse.quote(value)}" for key, value in gets.items()])
+        if context['is_paginated'] and not settings.KEYSET_PAGINATION:
+            context['page_range'] = list(context['paginator'].get_elided_page_range(context['page_obj'].number))
         return context
 
 
+def project_generation(request: HttpRequest, pk: int) -> str:
+    return f"project-{pk}-{generations.get(pk)}"
+
+
+@method_decorator(read_replica, name='dispatch')
+@method_decorator(
+    pagecache.cache_anonymous_page(600, project_generation, pagecache.DETAIL_PAGES), name='dispatch',
+)
 class ProjectDetailView(generic.DetailView):
     model = models.Project
     template_name = 'tasks/project_detail.html'
@@ -43,6 +82,7 @@ class ProjectDetailView(generic.DetailView):
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         context['like_types'] = models.LIKE_TYPE_CHOICES
+        context['generation'] = generations.get(self.object.pk)
         return context
 
 
@@ -94,118 +134,152 @@ class ProjectDeleteView(LoginRequiredMixin,
         return self.get_object().owner == self.request.user or self.request.user.is_superuser
 
 
+@read_replica
+@pagecache.cache_anonymous_page()
 def index(request: HttpRequest) -> HttpResponse:
-    tasks = models.Task.objects
-    undone_tasks = tasks.filter(is_done=False)
-    common_dashboard = [
-        (_('users').title(), get_user_model().objects.count()),
-        (
-            _('projects').title(), 
-            models.Project.objects.count(), 
-            reverse('project_list'),
-        ),
-        (
-            _('tasks').title(),
-            tasks.count(),
-            reverse('task_list'),
-        ),
-        (
-            _('undone tasks').title(),
-            undone_tasks.count(),
-        ),
-        (
-            _('overdue tasks').title(),
-            undone_tasks.filter(deadline__lte=datetime.now()).count(),
-        ),
-        (
-            _('done tasks').title(),
-            tasks.filter(is_done=True).count(),
-        )
-    ]
+    stats = dashboard.get_dashboard_stats(request.user)
+    undone_tasks = models.Task.objects.filter(is_done=False)
     if request.user.is_authenticated:
-        user_tasks = tasks.filter(owner=request.user)
-        user_undone_tasks = user_tasks.filter(is_done=False)
-        user_dashboard = [
-            (
-                _('projects').title(),
-                models.Project.objects.filter(owner=request.user).count(),
-                reverse('project_list') + f"?owner={request.user.username}",
-            ),
-            (
-                _('tasks').title(),
-                user_tasks.count(),
-                reverse('task_list') + f"?owner={request.user.username}",
-            ),
-            (
-                _('undone tasks').title(),
-                user_undone_tasks.count(),
-            ),
-            (
-                _('overdue tasks').title(),
-                user_undone_tasks.filter(is_done=False).count(),
-            ),
-        ]
-        undone_tasks = user_undone_tasks.all()[:5]
+        user_dashboard = dashboard.get_user_dashboard(stats, request.user)
+        undone_tasks = undone_tasks.filter(owner=request.user)
     else:
         user_dashboard = None
-        undone_tasks = undone_tasks.all()[:5]
     context = {
-        'common_dashboard': common_dashboard,
+        'common_dashboard': dashboard.get_common_dashboard(stats),
         'user_dashboard': user_dashboard,
-        'undone_tasks': undone_tasks,
+        'undone_tasks': undone_tasks[:5],
     }
     return render(request, 'tasks/index.html', context)
 
+def switch_language(request: HttpRequest) -> HttpResponse:
+    next_url = request.GET.get('next')
+    if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        next_url = reverse('index')
+    response = redirect(next_url)
+    language = request.GET.get('language')
+    if language and check_for_language(language):
+        response.set_cookie(
+            settings.LANGUAGE_COOKIE_NAME,
+            language,
+            max_age=settings.LANGUAGE_COOKIE_AGE,
+            path=settings.LANGUAGE_COOKIE_PATH,
+            domain=settings.LANGUAGE_COOKIE_DOMAIN,
+            secure=settings.LANGUAGE_COOKIE_SECURE,
+            httponly=settings.LANGUAGE_COOKIE_HTTPONLY,
+            samesite=settings.LANGUAGE_COOKIE_SAMESITE,
+        )
+    return response
+
+@read_replica
 def task_list(request: HttpRequest) -> HttpResponse:
     queryset = models.Task.objects
     owner_username = request.GET.get('owner')
     if owner_username:
         owner = get_object_or_404(get_user_model(), username=owner_username)
         queryset = queryset.filter(owner=owner)
+    project = None
     project_pk = request.GET.get('project')
     if project_pk:
         project = get_object_or_404(models.Project, pk=project_pk)
         queryset = queryset.filter(project=project)
     search_name = request.GET.get('search_name')
     if search_name:
-        queryset = queryset.filter(name__icontains=search_name)
-    page_obj = Paginator(queryset.all(), 5).get_page(request.GET.get('page', 1))
+        queryset = queryset.search(search_name)
+    if settings.KEYSET_PAGINATION:
+        page_obj = paginators.KeysetPaginator(queryset.all(), 5).get_page(request.GET.get('cursor'))
+    else:
+        page_obj = Paginator(queryset.all(), 5).get_page(request.GET.get('page', 1))
     gets = request.GET.copy()
-    if "page" in gets:
-        gets.pop("page")
+    for key in ("page", "cursor"):
+        if key in gets:
+            gets.pop(key)
     filters = "&".join([f"{key}={parse.quote(value)}" for key, value in gets.items()])
     context = {
         'task_list': page_obj,
-        'project_list': models.Project.objects.all(),
-        'user_list': get_user_model().objects.all().order_by('username'),
+        'project_filter': project,
         'next': reverse('task_list') + '?' + \
             '&'.join([f"{key}={value}" for key, value in request.GET.items()]),
         'filters': filters,
         'page_obj': page_obj,
     }
+    if not settings.KEYSET_PAGINATION:
+        context['page_range'] = list(page_obj.paginator.get_elided_page_range(page_obj.number))
     return render(request, 'tasks/task_list.html', context)
 
+def autocomplete_cache_key(kind: str, term: str) -> str:
+    return f"autocomplete:{kind}:{hashlib.md5(term.lower().encode()).hexdigest()}"
+
+@cache_control(max_age=60)
+def autocomplete_users(request: HttpRequest) -> JsonResponse:
+    term = request.GET.get('q', '').strip()
+    key = autocomplete_cache_key('users', term)
+    results = cache.get(key)
+    if results is None:
+        users = get_user_model().objects.none()
+        if term:
+            users = get_user_model().objects.filter(
+                Q(username__istartswith=term) | Q(first_name__istartswith=term) | Q(last_name__istartswith=term)
+            ).order_by('username')
+        results = [
+            {'id': username, 'text': f"{first_name} {last_name} ({username})".strip()}
+            for username, first_name, last_name
+            in users.values_list('username', 'first_name', 'last_name')[:AUTOCOMPLETE_LIMIT]
+        ]
+        cache.set(key, results, AUTOCOMPLETE_TIMEOUT)
+    return JsonResponse({'results': results})
+
+@cache_control(max_age=60)
+def autocomplete_projects(request: HttpRequest) -> JsonResponse:
+    term = request.GET.get('q', '').strip()
+    key = autocomplete_cache_key('projects', term)
+    results = cache.get(key)
+    if results is None:
+        projects = models.Project.objects.none()
+        if term:
+            projects = models.Project.objects.filter(name__istartswith=term)
+        results = [
+            {'id': pk, 'text': name}
+            for pk, name in projects.values_list('pk', 'name')[:AUTOCOMPLETE_LIMIT]
+        ]
+        cache.set(key, results, AUTOCOMPLETE_TIMEOUT)
+    return JsonResponse({'results': results})
+
 def task_detail(request: HttpRequest, pk: int) -> HttpResponse:
     return render(request, 'tasks/task_detail.html', {
         'task': get_object_or_404(models.Task, pk=pk),
     })
 
 def task_done(request: HttpRequest, pk: int) -> HttpResponse:
-    task = get_object_or_404(models.Task, pk=pk)
-    if request.user in [task.owner, task.project.owner]:
-        task.is_done = not task.is_done
-        task.save()
-        messages.success(request, "{} {} {} {}".format(
+    toggled = 0
+    if request.user.is_authenticated:
+        toggled = models.Task.objects.filter(
+            Q(owner=request.user) | Q(project__owner=request.user), pk=pk,
+        ).update(
+            is_done=Case(When(is_done=True, then=Value(False)), default=Value(True)),
+        )
+    if toggled:
+        name, is_done = models.Task.objects.values_list('name', 'is_done').get(pk=pk)
+        message = "{} {} {} {}".format(
             _('task').capitalize(),
-            task.name,
+            name,
             _('marked as'),
-            _('done') if task.is_done else _('undone'),
-        ))
+            _('done') if is_done else _('undone'),
+        )
+    elif not models.Task.objects.filter(pk=pk).exists():
+        raise Http404
     else:
-        messages.error(request, "{}: {}".format(
+        message = "{}: {}".format(
             _('permission error').title(),
             _('you must be the owner of either the task itself or it\'s project'),
-        ))
+        )
+    if request.GET.get('format') == 'json':
+        if not toggled:
+            return JsonResponse({'error': message}, status=403)
+        return JsonResponse({'pk': pk, 'is_done': is_done, 'message': message})
+    if toggled:
+        messages.success(request, message)
+    else:
+        messages.error(request, message)
     if request.GET.get('next'):
         return redirect(request.GET.get('next'))
     return redirect(task_list)
@@ -255,13 +329,24 @@ def task_delete(request: HttpRequest, pk: int) -> HttpResponse:
 
 @login_required
 def project_like(request: HttpRequest, pk: int) -> HttpResponse:
-    project = get_object_or_404(models.Project, pk=pk)
-    like_type = request.GET.get('like_type') or 3
-    like = models.ProjectLike.objects.filter(project=project, user=request.user, like_type=like_type).first()
-    if not like:
-        models.ProjectLike.objects.create(project=project, user=request.user, like_type=like_type)
-    else:
-        like.delete()
+    if not models.Project.objects.filter(pk=pk).exists():
+        raise Http404
+    form = forms.ProjectLikeForm(request.GET)
+    if not form.is_valid():
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'error': form.errors['like_type'][0]}, status=400)
+        return HttpResponseBadRequest(form.errors['like_type'][0])
+    like_type = form.cleaned_data['like_type']
+    likes = models.ProjectLike.objects.filter(project_id=pk, user=request.user, like_type=like_type)
+    deleted, _deleted_by_model = likes.delete()
+    if not deleted:
+        try:
+            with transaction.atomic():
+                models.ProjectLike.objects.create(project_id=pk, user=request.user, like_type=like_type)
+        except IntegrityError:
+            pass
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'project': pk, 'like_type': like_type, 'liked': not deleted})
     if request.GET.get('next'):
         return redirect(request.GET.get('next'))
     return redirect('project_list')
@@ -2,7 +2,8 @@ from typing import Any
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import get_user_model
-from . import models
+from PIL import Image
+from . import models, pictures
 
 class CreateUserForm(UserCreationForm):
     class Meta:
@@ -26,3 +27,15 @@ class ProfileForm(forms.ModelForm):
     class Meta:
         model = models.Profile
         fields = ("picture", )
+
+    def clean_picture(self):
+        picture = self.cleaned_data["picture"]
+        if picture and 'picture' in self.changed_data:
+            try:
+                with Image.open(picture) as image:
+                    pictures.check_pixels(image)
+            except (ValueError, Image.DecompressionBombError) as error:
+                raise forms.ValidationError(str(error))
+            finally:
+                picture.seek(0)
+        return picture
@@ -0,0 +1,42 @@
+import io
+import tempfile
+import time
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from PIL import Image
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure logins per second for a user with a profile picture, rolling back all changes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            try:
+                with transaction.atomic():
+                    self.run_benchmark(options['iterations'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def run_benchmark(self, iterations: int) -> None:
+        user = get_user_model().objects.create_user('benchmark-login-user')
+        buffer = io.BytesIO()
+        Image.new('RGB', (1600, 1200), 'orange').save(buffer, 'JPEG')
+        user.profile.picture.save('benchmark.jpg', ContentFile(buffer.getvalue()))
+        client = Client()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            client.force_login(user)
+            client.logout()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{iterations} logins in {elapsed:.3f}s, {iterations / elapsed:.1f} logins/s")
@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from ... import pictures
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP variants of newly uploaded profile pictures"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="process pool size, 0 to work inline")
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--interval', type=float, default=5, help="seconds to sleep when nothing is pending")
+        parser.add_argument('--once', action='store_true', help="process pending pictures and exit")
+
+    def handle(self, *args, **options):
+        executor = pictures.get_executor(options['workers'])
+        try:
+            while True:
+                processed, rejected = pictures.process_pending(executor, options['batch_size'])
+                if processed or rejected:
+                    self.stdout.write(f"processed {processed}, rejected {rejected}")
+                if processed + rejected >= options['batch_size']:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            if executor:
+                executor.shutdown()
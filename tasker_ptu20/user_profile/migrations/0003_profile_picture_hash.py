@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-16 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_profile', '0002_alter_profile_picture'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='picture_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='picture hash'),
+        ),
+    ]
@@ -1,14 +1,15 @@
-from typing import Iterable
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.urls import reverse
 from django.utils.translation import gettext as _
-from PIL import Image
+from . import pictures
 
 
 class Profile(models.Model):
     user = models.OneToOneField(get_user_model(), verbose_name=_("user"), on_delete=models.CASCADE)
     picture = models.ImageField(_("picture"), upload_to='user_pictures/', blank=True, null=True)
+    picture_hash = models.CharField(_("picture hash"), max_length=64, blank=True, default='', editable=False)
 
     class Meta:
         verbose_name = _("profile")
@@ -20,10 +21,37 @@ class Profile(models.Model):
     def get_absolute_url(self):
         return reverse("user_detail_current", kwargs={"pk": self.pk})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._get_field_values()
+        return instance
+
+    def _get_field_values(self) -> dict[str, object]:
+        return {
+            field.attname: field.get_prep_value(field.value_from_object(self))
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def get_dirty_fields(self) -> set[str]:
+        loaded = getattr(self, '_loaded_values', None)
+        current = self._get_field_values()
+        if loaded is None:
+            return set(current)
+        return {name for name, value in current.items() if loaded.get(name) != value}
+
     def save(self, *args, **kwargs) -> None:
+        if 'picture' in self.get_dirty_fields():
+            self.picture_hash = ''
         super().save(*args, **kwargs)
-        if self.picture:
-            image = Image.open(self.picture.path)
-            if image.size[0] > 400 or image.size[1] > 300:
-                image.resize((400, 300))
-                image.save(self.picture.path)
+        self._loaded_values = self._get_field_values()
+
+    @property
+    def picture_variants(self) -> dict[str, str]:
+        if not self.picture or not self.picture_hash:
+            return {}
+        return {
+            size: default_storage.url(pictures.variant_name(self.picture_hash, size))
+            for size in pictures.PICTURE_SIZES
+        }
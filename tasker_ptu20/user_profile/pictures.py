@@ -0,0 +1,88 @@
+import hashlib
+import logging
+import warnings
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+PICTURE_SIZES = {
+    'small': (64, 64),
+    'medium': (200, 200),
+    'large': (400, 300),
+}
+MAX_PICTURE_PIXELS = 24_000_000
+VARIANTS_DIR = 'user_pictures/variants'
+
+
+def variant_name(picture_hash: str, size: str) -> str:
+    return f"{VARIANTS_DIR}/{picture_hash}_{size}.webp"
+
+
+def check_pixels(image: Image.Image, max_pixels: int | None = None) -> None:
+    width, height = image.size
+    if width * height > (max_pixels or MAX_PICTURE_PIXELS):
+        raise ValueError(f"picture of {width}x{height} pixels is too large")
+
+
+def process_picture(source: str, media_root: str, max_pixels: int | None = None) -> str:
+    data = Path(source).read_bytes()
+    picture_hash = hashlib.sha256(data).hexdigest()[:32]
+    root = Path(media_root)
+    root.joinpath(VARIANTS_DIR).mkdir(parents=True, exist_ok=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        for size, dimensions in PICTURE_SIZES.items():
+            target = root.joinpath(variant_name(picture_hash, size))
+            if target.exists():
+                continue
+            with Image.open(source) as image:
+                check_pixels(image, max_pixels)
+                image.draft('RGB', dimensions)
+                image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+                image.thumbnail(dimensions)
+                image.save(target, 'WEBP', quality=80)
+    return picture_hash
+
+
+def process_pending(executor: Executor | None = None, batch_size: int = 20) -> tuple[int, int]:
+    from .models import Profile
+    pending = list(
+        Profile.objects.exclude(picture='').exclude(picture__isnull=True)
+        .filter(picture_hash='').values_list('pk', 'picture')[:batch_size]
+    )
+    if not pending:
+        return 0, 0
+    media_root = str(settings.MEDIA_ROOT)
+    if executor is None:
+        results = []
+        for pk, name in pending:
+            try:
+                results.append((pk, name, process_picture(str(Path(media_root, name)), media_root), None))
+            except Exception as error:
+                results.append((pk, name, None, error))
+    else:
+        futures = [
+            (pk, name, executor.submit(process_picture, str(Path(media_root, name)), media_root))
+            for pk, name in pending
+        ]
+        results = []
+        for pk, name, future in futures:
+            error = future.exception()
+            results.append((pk, name, None if error else future.result(), error))
+    processed = rejected = 0
+    for pk, name, picture_hash, error in results:
+        if error:
+            logger.warning("rejected profile picture %s: %s", name, error)
+            Profile.objects.filter(pk=pk, picture=name).update(picture=None, picture_hash='')
+            rejected += 1
+        else:
+            Profile.objects.filter(pk=pk, picture=name).update(picture_hash=picture_hash)
+            processed += 1
+    return processed, rejected
+
+
+def get_executor(workers: int) -> Executor | None:
+    return ProcessPoolExecutor(max_workers=workers) if workers else None
@@ -5,8 +5,13 @@ from . import models
 
 
 @receiver(post_save, sender=get_user_model())
-def sync_user_profile(sender, instance, created, **kwargs):
-    if created or not hasattr(instance, 'profile'):
+def sync_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    if created:
         models.Profile.objects.create(user=instance)
-    else:
+    elif update_fields is not None:
+        # partial saves, like last_login on every login, never touch the profile
+        return
+    elif not hasattr(instance, 'profile'):
+        models.Profile.objects.create(user=instance)
+    elif instance.profile.get_dirty_fields():
         instance.profile.save()
@@ -1,3 +1,81 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from . import models, pictures
 
-# Create your tests here.
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_picture(size=(800, 600), name='picture.jpg'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ProfilePictureTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('jonas', password='secret')
+        self.client.force_login(self.user)
+
+    def upload(self, picture):
+        return self.client.post(reverse('user_update'), {'picture': picture})
+
+    def test_upload_is_processed_off_request(self):
+        self.assertRedirects(self.upload(make_picture()), reverse('user_detail_current'))
+        profile = models.Profile.objects.get(user=self.user)
+        self.assertEqual(profile.picture_hash, '')
+        self.assertEqual(pictures.process_pending(), (1, 0))
+        profile.refresh_from_db()
+        self.assertEqual(len(profile.picture_hash), 32)
+        for size, dimensions in pictures.PICTURE_SIZES.items():
+            with Image.open(f"{MEDIA_ROOT}/{pictures.variant_name(profile.picture_hash, size)}") as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertLessEqual(image.size[0], dimensions[0])
+                self.assertLessEqual(image.size[1], dimensions[1])
+        response = self.client.get(reverse('user_detail_current'))
+        self.assertContains(response, profile.picture_variants['medium'])
+
+    def test_decompression_bomb_rejected(self):
+        with mock.patch.object(pictures, 'MAX_PICTURE_PIXELS', 1000):
+            response = self.upload(make_picture())
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(models.Profile.objects.get(user=self.user).picture)
+        self.upload(make_picture())
+        with mock.patch.object(pictures, 'MAX_PICTURE_PIXELS', 1000), self.assertLogs(pictures.logger, 'WARNING'):
+            self.assertEqual(pictures.process_pending(), (0, 1))
+        self.assertFalse(models.Profile.objects.get(user=self.user).picture)
+
+
+class ProfileSyncTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('jonas', password='secret')
+
+    def test_login_does_not_touch_profile(self):
+        user = get_user_model().objects.get(pk=self.user.pk)
+        with mock.patch.object(models.Profile, 'save') as save:
+            self.client.force_login(user)
+            user.first_name = 'Jonas'
+            user.save()
+        save.assert_not_called()
+
+    def test_dirty_fields(self):
+        profile = models.Profile.objects.get(user=self.user)
+        self.assertEqual(profile.get_dirty_fields(), set())
+        profile.picture_hash = 'abc'
+        profile.picture = 'user_pictures/new.jpg'
+        self.assertEqual(profile.get_dirty_fields(), {'picture', 'picture_hash'})
+        profile.save()
+        self.assertEqual(profile.picture_hash, '')
+        self.assertEqual(profile.get_dirty_fields(), set())
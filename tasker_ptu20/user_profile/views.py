@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils.translation import gettext_lazy as _
+from tasker_ptu20.routers import read_replica
 from . import forms
 
 User = get_user_model()
@@ -22,6 +23,7 @@ def signup(request: HttpRequest) -> HttpResponse:
     })
 
 @login_required
+@read_replica
 def user_detail(request: HttpRequest, username: str | None = None) -> HttpResponse:
     if username:
         user = get_object_or_404(User, username=username)